@@ -0,0 +1,87 @@
+# benchmarks/bench_playlist_owner_index.py
+"""
+قياس list_names / get_urls على متجر اصطناعى من 100 ألف قائمة:
+المسح الكامل القديم مقابل فهرس المالك، للتخزينين JSON و SQLite.
+
+    python benchmarks/bench_playlist_owner_index.py [عدد القوائم]
+"""
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from modules.playlist_store import JsonBackend, PlaylistStore, SqliteBackend  # noqa: E402
+
+N_PLAYLISTS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+N_GUILDS    = N_PLAYLISTS // 10
+N_OWNERS    = N_PLAYLISTS // 5
+LOOKUPS     = 2_000
+
+
+def synthetic() -> dict:
+    rnd = random.Random(42)
+    data: dict = {}
+    for i in range(N_PLAYLISTS):
+        g = str(rnd.randrange(N_GUILDS))
+        data.setdefault(g, {})[f"pl{i}"] = {
+            "owner": str(rnd.randrange(N_OWNERS)),
+            "urls": [f"https://example.com/{i}/{j}.mp3" for j in range(3)],
+        }
+    return data
+
+
+def full_scan_list_names(data: dict, guild_id: int, user_id: int) -> list:
+    """الخوارزميّة السابقة: مرور على كل السيرفرات وكل القوائم."""
+    names = set(data.get(str(guild_id), {}).keys())
+    for g in data.values():
+        for n, rec in g.items():
+            if rec["owner"] == str(user_id):
+                names.add(n)
+    return sorted(names)
+
+
+def bench(label: str, fn, queries) -> float:
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    per = (time.perf_counter() - t0) / len(queries) * 1e6
+    print(f"  {label:<28} {per:10.1f} µs/op")
+    return per
+
+
+def main() -> None:
+    data = synthetic()
+    rnd = random.Random(7)
+    queries = [(rnd.randrange(N_GUILDS), rnd.randrange(N_OWNERS)) for _ in range(LOOKUPS)]
+    print(f"{N_PLAYLISTS:,} playlists / {N_GUILDS:,} guilds / {N_OWNERS:,} owners")
+
+    print("list_names")
+    base = bench("full scan (old)", lambda g, u: full_scan_list_names(data, g, u),
+                 queries[:200])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "playlists.json"
+        src.write_text(json.dumps(data), encoding="utf-8")
+        stores = {
+            "json + owner index": PlaylistStore(JsonBackend(src)),
+            "sqlite + owner index": PlaylistStore(
+                SqliteBackend(Path(tmp) / "playlists.db", import_from=src)),
+        }
+        for label, store in stores.items():
+            per = bench(label, store.list_names, queries)
+            print(f"  {'':<28} ×{base / per:,.0f} faster")
+
+        print("get_urls (owner fallback, name not in guild)")
+        owned = [(rec["owner"], n) for g in data.values()
+                 for n, rec in g.items()][:LOOKUPS]
+        misses = [(-1, int(u), n) for u, n in owned]
+        for label, store in stores.items():
+            bench(label, store.get_urls, misses)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 # bot.py
 import os
+import signal
 import asyncio
 import discord
 from discord.ext import commands
 from imageio_ffmpeg import get_ffmpeg_exe
 
 from modules.logger_config import setup_logger
+from modules.loop_monitor import LoopLagMonitor
 
 logger = setup_logger("quran_bot")
 ffmpeg_exe = get_ffmpeg_exe()
@@ -18,9 +20,13 @@ class QuranBot(commands.Bot):
         intents.voice_states = True
         super().__init__(command_prefix="!", intents=intents)
         self.ffmpeg_exe = ffmpeg_exe
+        self.loop_monitor = LoopLagMonitor(
+            threshold=float(os.getenv("LOOP_LAG_THRESHOLD", 0.25)), logger=logger)
 
     # ------------------------
     async def setup_hook(self):
+        self.loop_monitor.start()
+
         # Cogs المباشرة
         from cogs.player import Player
 
@@ -43,6 +49,12 @@ async def main():
     if not token:
         logger.error("❌ DISCORD_TOKEN not set.")
         return
+    # إعادة النشر ترسل SIGTERM → إغلاق منظّم (لقطة أخيرة للطوابير) بدل القتل المباشر
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, lambda: asyncio.ensure_future(bot.close()))
+    except NotImplementedError:
+        pass
     await bot.start(token)
 
 
@@ -9,7 +9,7 @@ HELP_TEXT = """
 ➤ أضف مقطع يوتيوب أو فيسبوك أو ابحث باسم القارئ أو السورة.
 
 **/queue**
-➤ عرض قائمة التشغيل الحالية.
+➤ عرض قائمة التشغيل الحالية (صفحات يُتنقَّل بينها بالأزرار).
 
 **/play**
 ➤ بدء التشغيل أو استئناف المقطع الحالي.
@@ -26,9 +26,15 @@ HELP_TEXT = """
 **/jump `<رقم>`**
 ➤ الانتقال لمقطع معيّن في الطابور.
 
+**/remove `<رقم>`** · **/move `<رقم>` `<إلى>`** · **/shuffle**
+➤ حذف مقطع من الطابور، أو نقله لموضع آخر، أو خلط المقاطع القادمة.
+
 **/restart**
 ➤ العودة إلى المقطع الأول في الطابور.
 
+**/broadcast-start `<اسم>` `<قائمة أو رابط>`** · **/broadcast-join `<اسم>`** · **/broadcast-leave**
+➤ بثّ تلاوة مستمرّة واحدة لعدّة سيرفرات معًا (ترميز واحد لكل المستمعين).
+
 ---
 
 **💡 نصائح متقدّمة:**
@@ -41,7 +47,7 @@ HELP_TEXT = """
 
 **🔗 ملاحظات عامة:**
 - تأكد من وجودك في قناة صوتية عند استخدام أوامر التشغيل.
-- سيتم حذف الطابور إذا خرجت البوت من القناة الصوتية أو استخدمت /stop.
+- سيتم حذف الطابور إذا خرج البوت من القناة الصوتية أو استخدمت /stop، ويغادر تلقائيًّا إن خلت القناة أو توقّف التشغيل لبضع دقائق.
 - كل مقطع يُشغل منفصل عن الآخرين لتسهيل التحكم.
 
 __تم تطوير هذا البوت لخدمة بث التلاوات بشكل احترافي وسهل الاستخدام. جزاكم الله خيرًا.__
@@ -1,14 +1,23 @@
 # cogs/player.py
-import asyncio, re, discord
+import asyncio, os, re, time, discord
 from dataclasses import dataclass, field
-from datetime import datetime
 from discord import app_commands
 from discord.ext import commands
-from mutagen.mp3 import MP3
 
 from modules.logger_config  import setup_logger
-from modules.downloader     import Downloader
+from modules.downloader     import Downloader, merge_media
+from modules.scheduler      import Priority
+from modules.audio_sources  import open_source, opens_in_process, tracked
+from modules.embed_updater  import EmbedUpdater
+from modules.prefetch       import PrefetchManager
+from modules.broadcast      import BroadcastStation
+from modules.quran_catalog  import QuranCatalog, normalize_ar
+from modules.title_index    import TitleIndex
+from modules.track_queue    import TrackQueue
+from modules.session_store  import SessionStore
+from modules.search_cache   import SearchCache
 from modules.playlist_store import PlaylistStore   # ← النسخة الجديدة من المتجر
+from cogs.ui                import QueueView
 
 _RX_URL = re.compile(r"https?://", re.I)
 
@@ -16,30 +25,117 @@ _RX_URL = re.compile(r"https?://", re.I)
 # ────────────────── حالة كل Guild ────────────────── #
 @dataclass
 class GuildState:
-    playlist:      list[dict]               = field(default_factory=list)
-    index:         int                      = -1
+    queue:         TrackQueue               = field(default_factory=TrackQueue)
     vc:            discord.VoiceClient | None = None
     msg:           discord.Message  | None  = None
-    timer:         asyncio.Task     | None  = None
+    channel:       discord.abc.Messageable | None = None
     prefetch_task: asyncio.Task     | None  = None
+    primed:        tuple | None             = None   # (Track, AudioSource) جاهز للتالى
+    ended_at:      float | None             = None   # لحظة انتهاء المقطع السابق
+    broadcast:     str | None               = None   # اسم البثّ المشترك فيه
+    idle_since:    float | None             = None   # أوّل فحص وُجد فيه السيرفر خاملًا
+    stalled:       bool                     = False  # توقّف التشغيل بعد مقاطع متتالية فاشلة
 
 
 # ────────────────── Player Cog ────────────────── #
 class Player(commands.Cog):
     """بثّ تلاوات + إدارة قوائم تشغيل مخصّصة."""
     SEARCH_LIMIT = 5
+    # تشغيل فورى من رابط الوسائط المباشر بينما يمتلئ الكاش فى الخلفيّة
+    STREAM_WHILE_DOWNLOADING = os.getenv("STREAM_MODE", "1") == "1"
+    STREAM_URL_TTL = 3600          # روابط يوتيوب المباشرة تنتهى صلاحيّتها
+    FFMPEG_RECONNECT = "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5"
+    PRIME_AHEAD = 15               # ثوانٍ قبل النهاية لفتح مصدر رابط مباشر تالٍ
+    IMPORT_LIMIT = 500             # أقصى عدد مقاطع فى استيراد واحد
+    IMPORT_PROGRESS_EVERY = 2.0    # ثوانٍ بين تحديثات رسالة التقدّم
+    IDLE_CHECK_EVERY = 30          # ثوانٍ بين جولات فحص الخمول
+    MAX_SKIPS = 5                  # مقاطع فاشلة متتالية تُتخطّى قبل إيقاف التشغيل
 
     def __init__(self, bot: commands.Bot):
         self.bot     = bot
         self.logger  = setup_logger(__name__)
-        self.dl      = Downloader(self.logger)
-        self.store   = PlaylistStore()
+        self.dl      = Downloader(self.logger,
+                                  revalidate=os.getenv("CACHE_REVALIDATE") == "1",
+                                  max_bytes=int(os.getenv("CACHE_MAX_BYTES", 5 * 1024**3)),
+                                  policy=os.getenv("CACHE_POLICY", "lru"),
+                                  migrate_mp3=os.getenv("CACHE_MIGRATE_MP3", "1") == "1",
+                                  workers=int(os.getenv("DOWNLOAD_WORKERS", 3)),
+                                  extract_mode=os.getenv("EXTRACT_MODE", "thread"),
+                                  recycle_after=int(os.getenv("EXTRACT_RECYCLE", 50)))
+        self.store   = PlaylistStore(os.getenv("PLAYLIST_BACKEND", "sqlite"))
+        self.search_cache = SearchCache(ttl=int(os.getenv("SEARCH_CACHE_TTL", 6 * 3600)),
+                                        logger=self.logger)
+        self.embeds  = EmbedUpdater(rate=float(os.getenv("EMBED_EDITS_PER_SEC", 5)),
+                                    interval=float(os.getenv("EMBED_REFRESH", 10)),
+                                    logger=self.logger)
+        self.prefetch = PrefetchManager(self.dl,
+                                        horizon=float(os.getenv("PREFETCH_HORIZON", 900)),
+                                        max_items=int(os.getenv("PREFETCH_MAX_ITEMS", 8)),
+                                        logger=self.logger)
+        self.catalog = QuranCatalog(os.getenv("QURAN_CATALOG") or None,
+                                    default_reciter=os.getenv("QURAN_DEFAULT_RECITER", "afs"),
+                                    logger=self.logger)
+        self.titles  = TitleIndex()             # يُبنى فى cog_load (قراءة المتجر خارج الحلقة)
         self.states: dict[int, GuildState] = {}
+        self.stations: dict[str, BroadcastStation] = {}
+        self.dl.protected = self._protected_paths
+        self._bg: set[asyncio.Task] = set()
+        self.gaps = {"transitions": 0, "last_ms": 0.0, "avg_ms": 0.0, "max_ms": 0.0}
+        # قناة فارغة أو لا تشغيل لهذه المدّة → مغادرة وتحرير حالة السيرفر (0 = معطّل)
+        self.idle_timeout = float(os.getenv("IDLE_TIMEOUT", 300))
+        self._sweeper: asyncio.Task | None = None
+        self.evictions = {"idle": 0, "disconnected": 0, "stop": 0}
+        # لقطات الطوابير للاستئناف بعد إعادة التشغيل (0 = معطّل)
+        self.snapshot_every = float(os.getenv("SNAPSHOT_INTERVAL", 10))
+        self.sessions = SessionStore() if self.snapshot_every > 0 else None
+        self._snapshotter: asyncio.Task | None = None
+        self._snapped: dict[int, tuple] = {}    # آخر صفّ مكتوب لكل سيرفر
+        self._snap_drop: set[int] = set()       # جلسات تُحذف فى اللقطة القادمة
+        self._restored = False
+        self.resume = {"sessions": 0, "restored": 0, "from_cache": 0,
+                       "restore_ms": 0.0, "since_start_s": None}
+
+    async def cog_load(self):
+        self.titles = self._build_titles(await asyncio.to_thread(self.store.titled_tracks))
+        if self.idle_timeout > 0:
+            self._sweeper = asyncio.create_task(self._sweep_idle())
+        if self.sessions is not None:
+            self._snapshotter = asyncio.create_task(self._snapshot_loop())
+
+    async def cog_unload(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+        if self._snapshotter:
+            self._snapshotter.cancel()
+            await self._snapshot()              # لقطة أخيرة قبل الإغلاق
+        for station in self.stations.values():
+            station.close()
+        self.embeds.close()
+        await self.dl.close()
 
     # ───────────── أدوات مساعدة ───────────── #
     def _st(self, gid: int) -> GuildState:
         return self.states.setdefault(gid, GuildState())
 
+    def _protected_paths(self) -> set[str]:
+        """ملفات قيد التشغيل أو فى أى طابور → لا تُخلى من الكاش."""
+        queued = [itm for st in self.states.values() for itm in st.queue]
+        queued += [itm for s in self.stations.values() for itm in s.items]
+        return {itm["path"] for itm in queued if "path" in itm}
+
+    def _build_titles(self, saved: list[tuple[str, str]]) -> TitleIndex:
+        """فهرس الإكمال التلقائى: الفهرس القرآنى + نتائج البحث + الكاش + القوائم المحفوظة."""
+        t0 = time.perf_counter()
+        idx = TitleIndex()
+        idx.add_many(self.catalog.suggestions())
+        idx.add_many((r["title"], r["url"]) for r in self.search_cache.results())
+        idx.add_many(((e.get("title"), e.get("url")) for _, e in self.dl.cache.entries()),
+                     weight=2)
+        idx.add_many(saved, weight=3)
+        self.logger.info(f"[titles] فُهرس {len(idx)} عنوانًا فى "
+                         f"{(time.perf_counter() - t0) * 1000:.0f}ms")
+        return idx
+
     @staticmethod
     def _fmt(sec: int) -> str:
         h, rem = divmod(int(sec), 3600); m, s = divmod(rem, 60)
@@ -66,29 +162,234 @@ class Player(commands.Cog):
             return False
 
         try:
-            st.vc = await channel.connect()
-            return True
+            vc = await channel.connect()
         except discord.ClientException as e:
             self.logger.warning(f"تعذّر الاتصال بالصوت: {e}")
             return False
+        # الحالة قد تكون أُخليت أثناء الاتصال → التسجيل فى الحالة الحاليّة
+        self._st(interaction.guild_id).vc = vc
+        return True
+
+    # ───────────── الخمول وتحرير الموارد ───────────── #
+    async def _sweep_idle(self):
+        """جولة دوريّة: السيرفر النشط = متّصل + يشغّل + فى القناة مستمع واحد على الأقلّ."""
+        while True:
+            await asyncio.sleep(self.IDLE_CHECK_EVERY)
+            now = time.monotonic()
+            for gid, st in list(self.states.items()):
+                if self._is_active(st):
+                    st.idle_since = None
+                    continue
+                if st.idle_since is None:
+                    st.idle_since = now
+                    continue
+                # حالة بلا اتّصال ولا طابور (أمر عرض فقط) لا تنتظر المهلة كاملة
+                if (st.vc is None and not st.queue) or now - st.idle_since >= self.idle_timeout:
+                    await self._evict(gid, "idle")
+
+    def _is_active(self, st: GuildState) -> bool:
+        vc = st.vc
+        if vc is None or not vc.is_connected() or not vc.is_playing():
+            return False
+        return self._has_listeners(vc.channel)
+
+    def _has_listeners(self, channel) -> bool:
+        """مستمع واحد على الأقلّ غير البوتات (من حالات الصوت، بلا intent الأعضاء)."""
+        for uid in channel.voice_states:
+            member = channel.guild.get_member(uid)
+            if uid != self.bot.user.id and not (member and member.bot):
+                return True
+        return False
+
+    async def _evict(self, gid: int, reason: str):
+        """مغادرة الصوت وإلغاء المهامّ وحذف حالة السيرفر بالكامل."""
+        st = self.states.pop(gid, None)
+        if st is None:
+            return
+        st.queue.clear(); st.broadcast = None       # _track_ended لا يجد ما يشغّله
+        if st.prefetch_task and not st.prefetch_task.done():
+            st.prefetch_task.cancel()
+        self._discard(st.primed); st.primed = None
+        self.prefetch.forget(gid)
+        self.embeds.untrack(gid)
+        if st.vc:
+            try:
+                st.vc.stop()
+                await st.vc.disconnect(force=True)
+            except Exception as exc:
+                self.logger.debug(f"[idle] تعذّر قطع الاتصال ({gid}): {exc}")
+        self.evictions[reason] += 1
+        if self.sessions is not None:
+            self._snapped.pop(gid, None)
+            self._snap_drop.add(gid)            # لا استئناف لجلسة انتهت
+        self.logger.info(f"[idle] أُخليت حالة السيرفر {gid} ({reason})")
+        if reason == "idle" and st.channel is not None and st.vc is not None:
+            try:
+                await st.channel.send("👋 غادرت القناة الصوتيّة لعدم النشاط.")
+            except discord.HTTPException:
+                pass
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member,
+                                    before: discord.VoiceState, after: discord.VoiceState):
+        # طُرد البوت أو فُصل من القناة → لا إعادة اتّصال، تحرير مباشر
+        if member.id != self.bot.user.id or after.channel is not None:
+            return
+        st = self.states.get(member.guild.id)
+        if st is not None and st.vc is not None and not st.vc.is_connected():
+            await self._evict(member.guild.id, "disconnected")
+
+    # ───────────── اللقطات والاستئناف ───────────── #
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_every)
+            await self._snapshot()
+
+    async def _snapshot(self):
+        """
+        لقطة تزايديّة: صفّ الموضع للسيرفرات التى تغيّر موضعها، ومقاطع الطابور
+        من أوّل موضع تغيّر فقط؛ الكتابة كلها معاملة واحدة فى خيط.
+        """
+        if self.sessions is None:
+            return
+        rows, tracks, live = [], {}, set()
+        for gid, st in self.states.items():
+            q, vc = st.queue, st.vc
+            if st.broadcast or q.pos < 0 or vc is None or not vc.is_connected():
+                continue
+            live.add(gid)
+            playing = vc.is_playing() or vc.is_paused()
+            offset = float(getattr(vc.source, "position", 0) or 0) if playing else 0.0
+            row = (gid, vc.channel.id, getattr(st.channel, "id", None), q.pos,
+                   round(offset, 1), int(vc.is_paused()))
+            dirty = q.take_dirty()
+            if gid not in self._snapped:
+                dirty = 0                       # أوّل لقطة للسيرفر → الطابور كاملًا
+            if dirty is not None:
+                tracks[gid] = (dirty, [(t["url"], None if t.get("title") == "—" else t.get("title"),
+                                        t.get("duration") or None) for t in q[dirty:]])
+            if dirty is not None or row != self._snapped.get(gid):
+                rows.append(row)
+            self._snapped[gid] = row
+        gone = set(self._snapped) - live
+        for gid in gone:
+            del self._snapped[gid]
+        drop = (self._snap_drop | gone) - live
+        self._snap_drop.clear()
+        if not (rows or tracks or drop):
+            return
+        try:
+            await asyncio.to_thread(self.sessions.write, rows, tracks, drop)
+        except Exception as exc:
+            self.logger.warning(f"[snapshot] تعذّرت الكتابة: {exc}")
+            # اللقطة القادمة تعيد ما لم يُكتب فقط: الصفوف، وذيل كل طابور متغيّر
+            for row in rows:
+                if row[0] in self._snapped:
+                    self._snapped[row[0]] = ()
+            for gid, (start, _) in tracks.items():
+                st = self.states.get(gid)
+                if st is not None:
+                    st.queue.mark_dirty(start)
+            self._snap_drop |= drop
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """الاستئناف بعد إعادة التشغيل: اتّصال + الطابور المحفوظ + -ss للموضع."""
+        if self._restored or self.sessions is None:
+            return
+        self._restored = True                   # on_ready يتكرّر مع إعادة اتصال البوابة
+        t0 = time.monotonic()
+        sessions = await asyncio.to_thread(self.sessions.load)
+        if not sessions:
+            return
+        results = await asyncio.gather(*(self._resume(s) for s in sessions),
+                                       return_exceptions=True)
+        for s, res in zip(sessions, results):
+            if isinstance(res, Exception):
+                self.logger.warning(f"[resume] تعذّر استئناف {s['guild_id']}: {res}")
+                self._snap_drop.add(s["guild_id"])
+        self.resume.update(
+            sessions=len(sessions),
+            restored=sum(r is True for r in results),
+            restore_ms=round((time.monotonic() - t0) * 1000, 1),
+            since_start_s=self._process_uptime())
+        self.logger.info(f"[resume] استُؤنف {self.resume['restored']}/{len(sessions)} سيرفر "
+                         f"فى {self.resume['restore_ms']}ms "
+                         f"({self.resume['since_start_s']}s منذ بدء العمليّة)")
+
+    async def _resume(self, s: dict) -> bool:
+        gid = s["guild_id"]
+        guild = self.bot.get_guild(gid)
+        channel = guild.get_channel(s["voice_channel"]) if guild else None
+        # القناة حُذفت أو خلت → لا داعى للاتّصال
+        if channel is None or not s["tracks"] or not self._has_listeners(channel):
+            self._snap_drop.add(gid)
+            return False
+        st = self._st(gid)
+        if st.queue or st.vc:                   # أمر جديد سبق الاستئناف
+            return False
+        st.queue.extend(s["tracks"])
+        st.queue.jump(min(s["pos"], len(st.queue) - 1))
+        if s["text_channel"]:
+            st.channel = guild.get_channel(s["text_channel"])
+        st.vc = await channel.connect()
+        cur = st.queue.peek(1)
+        if self.dl.cached(cur["url"]):
+            self.resume["from_cache"] += 1
+        await self._advance(gid, start=float(s["position"] or 0))
+        if s["paused"] and st.vc.is_playing():
+            st.vc.pause()
+        return True
+
+    @staticmethod
+    def _process_uptime() -> float | None:
+        """ثوانٍ منذ بدء العمليّة (Linux)، لقياس زمن الاستئناف كاملًا."""
+        try:
+            with open("/proc/self/stat") as f:
+                started = int(f.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+            with open("/proc/uptime") as f:
+                return round(float(f.read().split()[0]) - started, 2)
+        except (OSError, ValueError, IndexError, AttributeError):
+            return None
+
+    def _resource_stats(self) -> dict:
+        stats = {"guild_states": len(self.states),
+                 "voice_connections": len(self.bot.voice_clients),
+                 "idle": sum(st.idle_since is not None for st in self.states.values()),
+                 "queued_tracks": sum(len(st.queue) for st in self.states.values()),
+                 "bg_tasks": len(self._bg),
+                 **{f"evicted_{k}": v for k, v in self.evictions.items()}}
+        try:
+            with open("/proc/self/statm") as f:
+                stats["rss_mb"] = round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+                                        / 1024 ** 2, 1)
+        except (OSError, ValueError, AttributeError):
+            pass
+        return stats
 
     # ───────────── البحث يوتيوب/فيسبوك ───────────── #
-    async def _yt_search(self, query: str) -> list[dict]:
-        from yt_dlp import YoutubeDL
-        opts = {"quiet": True, "extract_flat": False,
-                "skip_download": True, "format": "bestaudio/best"}
+    async def _yt_search(self, query: str, gid: int = 0) -> list[dict]:
+        cached = self.search_cache.get(query)
+        if cached is not None:
+            return cached
         try:
-            data = await asyncio.to_thread(
-                lambda: YoutubeDL(opts).extract_info(
-                    f"ytsearch{self.SEARCH_LIMIT}:{query}", download=False))
+            entries = await self.dl.search(query, self.SEARCH_LIMIT, group=gid)
             res = []
-            for e in data.get("entries", []):
+            for e in entries:
+                thumbs = e.get("thumbnails") or []
                 res.append({
                     "url": f"https://www.youtube.com/watch?v={e['id']}",
-                    "title": e.get("title", "—"),
-                    "duration": self._fmt(e.get("duration", 0)),
-                    "thumb": e.get("thumbnail")
+                    "title": e.get("title") or "—",
+                    "duration": self._fmt(e.get("duration") or 0),
+                    "seconds": int(e.get("duration") or 0),
+                    "id": e["id"],
+                    "thumb": (e.get("thumbnail")
+                              or (thumbs[-1].get("url") if thumbs else None)
+                              or f"https://i.ytimg.com/vi/{e['id']}/hqdefault.jpg")
                 })
+            if res:
+                self.search_cache.put(query, res)
+                self.titles.add_many((r["title"], r["url"]) for r in res)
             return res
         except Exception as exc:
             self.logger.error(f"[بحث] {exc}", exc_info=True)
@@ -100,14 +401,16 @@ class Player(commands.Cog):
     @app_commands.command(name="plist-create", description="إنشاء قائمة تشغيل جديدة")
     async def plist_create(self, interaction: discord.Interaction, name: str):
         try:
-            self.store.create(interaction.guild_id, interaction.user.id, name)
+            await asyncio.to_thread(self.store.create,
+                                    interaction.guild_id, interaction.user.id, name)
             await interaction.response.send_message(f"✅ تم إنشاء **{name}**.", ephemeral=True)
         except ValueError as e:
             await interaction.response.send_message(str(e), ephemeral=True)
 
     @app_commands.command(name="plist-list", description="عرض أسماء القوائم المتاحة")
     async def plist_list(self, interaction: discord.Interaction):
-        names = self.store.list_names(interaction.guild_id, interaction.user.id)
+        names = await asyncio.to_thread(self.store.list_names,
+                                        interaction.guild_id, interaction.user.id)
         if not names:
             return await interaction.response.send_message("لا توجد قوائم.", ephemeral=True)
         await interaction.response.send_message(
@@ -119,18 +422,27 @@ class Player(commands.Cog):
     async def plist_add(self, interaction: discord.Interaction, name: str, input: str):
         await interaction.response.defer(thinking=True, ephemeral=True)
 
-        async def _insert(url: str):
+        async def _insert(url: str, meta: dict | None = None):
             try:
-                self.store.add_track(interaction.guild_id, interaction.user.id, name, url)
+                await asyncio.to_thread(self.store.add_track, interaction.guild_id,
+                                        interaction.user.id, name, url, **(meta or {}))
                 await interaction.followup.send("✅ أُضيف المقطع.", ephemeral=True)
             except (KeyError, PermissionError, ValueError) as e:
-                await interaction.followup.send(str(e), ephemeral=True)
+                return await interaction.followup.send(str(e), ephemeral=True)
+            if meta is None:
+                self._refresh_tracks(interaction, name, [{"url": url}])
+            else:
+                self.titles.add(meta["title"], url, weight=3)
 
         if self._is_url(input):
             return await _insert(input)
 
+        hit = self.catalog.resolve(input)
+        if hit is not None:
+            return await _insert(hit["url"], {"title": hit["title"]})
+
         # بحث وإظهار النتائج لاختيارها
-        results = await self._yt_search(input)
+        results = await self._yt_search(input, interaction.guild_id)
         if not results:
             return await interaction.followup.send("❌ لا توجد نتائج.", ephemeral=True)
 
@@ -152,7 +464,9 @@ class Player(commands.Cog):
 
             async def callback(self, i: discord.Interaction):
                 await i.response.defer(ephemeral=True)
-                await _insert(self.values[0])
+                r = next(r for r in results if r["url"] == self.values[0])
+                await _insert(r["url"], {"title": r["title"], "duration": r["seconds"],
+                                         "media_id": r.get("id")})
                 for c in self.view.children: c.disabled = True
                 await i.message.edit(view=self.view)
                 self.view.stop()
@@ -160,12 +474,96 @@ class Player(commands.Cog):
         v = discord.ui.View(); v.add_item(_Sel())
         await interaction.followup.send(embeds=embeds, view=v, ephemeral=True)
 
+    # -------- استيراد دفعة -------- #
+    @app_commands.command(name="plist-import",
+                          description="استيراد قائمة يوتيوب/ساوندكلاود أو عدّة روابط دفعة واحدة")
+    async def plist_import(self, interaction: discord.Interaction, name: str, source: str):
+        gid, uid = interaction.guild_id, interaction.user.id
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        # روابط مفصولة بمسافات/أسطر/فواصل، بلا تكرار وبنفس الترتيب
+        tokens = list(dict.fromkeys(t for t in re.split(r"[\s,]+", source) if t))
+        urls = [t for t in tokens if self._is_url(t)]
+        errors = [(t, "ليس رابطًا") for t in tokens if not self._is_url(t)]
+        if not urls:
+            return await interaction.followup.send("❌ لا توجد روابط صالحة.", ephemeral=True)
+        # القائمة تُنشأ بعد الحلّ فقط إن وُجد ما يُضاف (لا قوائم فارغة عند فشل كل شيء)
+        try:
+            await asyncio.to_thread(self.store.ensure_editable, gid, uid, name)
+            new = False
+        except KeyError:
+            new = True
+        except PermissionError as e:
+            return await interaction.followup.send(str(e), ephemeral=True)
+
+        async def _resolve(url: str) -> list[dict]:
+            if self.dl.is_playlist_url(url):
+                return await self.dl.expand(url, group=gid)
+            return [await self.dl.probe(url, priority=Priority.NEXT, group=gid)]
+
+        # استخراج مسطّح متوازٍ؛ المجدول يحدّ التزامن ويقدّم التشغيل الجارى
+        tasks = [asyncio.create_task(_resolve(u)) for u in urls]
+        msg = await interaction.followup.send(f"⏳ جارٍ حلّ 0/{len(urls)}…",
+                                              ephemeral=True, wait=True)
+        last = time.monotonic()
+        for n, fut in enumerate(asyncio.as_completed(tasks), 1):
+            try:
+                await fut
+            except Exception:
+                pass                        # يُجمع مع الأخطاء أدناه
+            if time.monotonic() - last >= self.IMPORT_PROGRESS_EVERY:
+                last = time.monotonic()
+                try:
+                    await msg.edit(content=f"⏳ جارٍ حلّ {n}/{len(urls)}…")
+                except discord.HTTPException:
+                    pass
+
+        tracks = []
+        for url, t in zip(urls, tasks):
+            if t.exception() is not None:
+                errors.append((url, str(t.exception())))
+                continue
+            for m in t.result():
+                tracks.append({"url": m["url"],
+                               "title": None if m["title"] == "—" else m["title"],
+                               "duration": m["duration"] or None,
+                               "media_id": m.get("media_id")})
+        dropped = max(0, len(tracks) - self.IMPORT_LIMIT)
+        tracks = tracks[:self.IMPORT_LIMIT]
+
+        added = 0
+        if tracks:
+            try:
+                if new:
+                    await asyncio.to_thread(self.store.create, gid, uid, name)
+            except ValueError:
+                pass                        # أُنشئت أثناء الحلّ → نضيف إليها
+            try:
+                added = await asyncio.to_thread(self.store.add_tracks,   # كتابة واحدة
+                                                gid, uid, name, tracks)
+            except (KeyError, PermissionError) as e:
+                return await msg.edit(content=str(e))
+        self.titles.add_many(((t["title"], t["url"]) for t in tracks if t["title"]), weight=3)
+
+        lines = [f"✅ أُضيف **{added}** مقطعًا إلى **{name}**." if added else
+                 "❌ لم يُضف أى مقطع" + ("؛ لم تُنشأ القائمة." if new else ".")]
+        if dropped:
+            lines.append(f"⚠️ تُجووز الحدّ ({self.IMPORT_LIMIT})؛ أُهمل {dropped} مقطعًا.")
+        if errors:
+            lines.append(f"❌ فشل {len(errors)}:")
+            lines += [f"• <{u[:100]}> — {str(err)[:120]}" for u, err in errors[:10]]
+            if len(errors) > 10:
+                lines.append(f"… و{len(errors) - 10} غيرها")
+        await msg.edit(content="\n".join(lines)[:2000])
+        self.logger.info(f"[plist] استيراد {added} مقطعًا إلى {name} ({len(errors)} أخطاء)")
+        self._refresh_tracks(interaction, name, [t for t in tracks if not t["title"]])
+
     # -------- إزالة مقطع -------- #
     @app_commands.command(name="plist-remove", description="حذف مقطع برقم ترتيبه")
     async def plist_remove(self, interaction: discord.Interaction,
                            name: str, number: int):
         try:
-            self.store.remove_track(interaction.guild_id, interaction.user.id, name, number)
+            await asyncio.to_thread(self.store.remove_track, interaction.guild_id,
+                                    interaction.user.id, name, number)
             await interaction.response.send_message("🗑️ تم الحذف.", ephemeral=True)
         except (KeyError, PermissionError, IndexError) as e:
             await interaction.response.send_message(str(e), ephemeral=True)
@@ -173,22 +571,30 @@ class Player(commands.Cog):
     # -------- عرض المحتوى -------- #
     @app_commands.command(name="plist-show", description="عرض محتويات قائمة")
     async def plist_show(self, interaction: discord.Interaction, name: str):
-        urls = self.store.get_urls(interaction.guild_id, interaction.user.id, name)
-        if urls is None:
+        tracks = await asyncio.to_thread(self.store.get_tracks,
+                                         interaction.guild_id, interaction.user.id, name)
+        if tracks is None:
             return await interaction.response.send_message("❌ القائمة غير موجودة.", ephemeral=True)
-        if not urls:
+        if not tracks:
             return await interaction.response.send_message("القائمة فارغة.", ephemeral=True)
 
-        emb = discord.Embed(title=f"قائمة: {name}", color=0x2ecc71)
-        for i, u in enumerate(urls, 1):
-            emb.add_field(name=str(i), value=u, inline=False)
+        lines = []
+        for i, t in enumerate(tracks, 1):
+            dur = f" [{self._fmt(t['duration'])}]" if t.get("duration") else ""
+            lines.append(f"**{i}.** {t.get('title') or t['url']}{dur}")
+        desc = "\n".join(lines)
+        if len(desc) > 4000:
+            desc = desc[:4000].rsplit("\n", 1)[0] + "\n…"
+        emb = discord.Embed(title=f"قائمة: {name}", description=desc, color=0x2ecc71)
         await interaction.response.send_message(embed=emb, ephemeral=True)
+        self._refresh_tracks(interaction, name, tracks)
 
     # -------- حذف كامل -------- #
     @app_commands.command(name="plist-delete", description="حذف القائمة بالكامل")
     async def plist_delete(self, interaction: discord.Interaction, name: str):
         try:
-            self.store.delete(interaction.guild_id, interaction.user.id, name)
+            await asyncio.to_thread(self.store.delete,
+                                    interaction.guild_id, interaction.user.id, name)
             await interaction.response.send_message("🗑️ تم حذف القائمة.", ephemeral=True)
         except (KeyError, PermissionError) as e:
             await interaction.response.send_message(str(e), ephemeral=True)
@@ -196,19 +602,178 @@ class Player(commands.Cog):
     # -------- تشغيل القائمة -------- #
     @app_commands.command(name="plist-play", description="تشغيل قائمة محفوظة")
     async def plist_play(self, interaction: discord.Interaction, name: str):
-        urls = self.store.get_urls(interaction.guild_id, interaction.user.id, name)
-        if urls is None:
+        if self._st(interaction.guild_id).broadcast:
+            return await interaction.response.send_message(
+                "📡 السيرفر مشترك فى بثّ؛ استخدم /broadcast-leave أولًا.", ephemeral=True)
+        tracks = await asyncio.to_thread(self.store.get_tracks,
+                                         interaction.guild_id, interaction.user.id, name)
+        if tracks is None:
             return await interaction.response.send_message("❌ القائمة غير موجودة.", ephemeral=True)
-        if not urls:
+        if not tracks:
             return await interaction.response.send_message("القائمة فارغة.", ephemeral=True)
 
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        entries = await self._saved_entries(tracks, interaction.guild_id)
+
         st = self._st(interaction.guild_id)
-        st.playlist = [{"url": u} for u in urls]
-        st.index = -1
-        await interaction.response.send_message(f"📜 تشغيل قائمة **{name}**.", ephemeral=True)
+        st.queue.replace(entries)
+        await interaction.followup.send(f"📜 تشغيل قائمة **{name}**.", ephemeral=True)
+        self._refresh_tracks(interaction, name, tracks)
         if await self._ensure_voice(interaction):
             await self._play_current(interaction)
 
+    async def _saved_entries(self, tracks: list[dict], gid: int) -> list[dict]:
+        """مقاطع قائمة محفوظة → عناصر خفيفة، مع توسيع روابط القوائم داخلها."""
+        entries = []
+        for t in tracks:
+            u = t["url"]
+            if self.dl.is_playlist_url(u):
+                try:
+                    entries.extend(await self.dl.expand(u, group=gid))
+                except Exception as exc:
+                    self.logger.warning(f"[plist] تعذّر توسيع {u}: {exc}")
+            else:
+                entries.append({"url": u, "title": t.get("title") or "—",
+                                "duration": t.get("duration") or 0})
+        return entries
+
+    def _refresh_tracks(self, interaction: discord.Interaction, name: str,
+                        tracks: list[dict]):
+        """حلّ بيانات المقاطع المحفوظة بلا عنوان فى الخلفيّة وتحديث المتجر والطابور."""
+        missing = [t["url"] for t in tracks
+                   if not t.get("title") and not self.dl.is_playlist_url(t["url"])]
+        if not missing:
+            return
+        gid, uid = interaction.guild_id, interaction.user.id
+
+        async def _run():
+            metas = await asyncio.gather(*(self.dl.probe(u, group=gid) for u in missing),
+                                         return_exceptions=True)
+            for url, meta in zip(missing, metas):
+                if isinstance(meta, Exception):
+                    self.logger.debug(f"[plist] تعذّر حلّ {url}: {meta}")
+                    continue
+                await asyncio.to_thread(self.store.update_meta, gid, uid, name, url,
+                                        title=meta["title"], duration=meta["duration"],
+                                        media_id=meta["media_id"])
+                self.titles.add(meta["title"], url, weight=3)
+                for itm in self._st(gid).queue:
+                    if itm["url"] == url and itm.get("title") in (None, "—"):
+                        itm.update(title=meta["title"], duration=meta["duration"])
+
+        self._spawn(_run())
+
+    # ════════════════════════════════
+    #        البثّ المشترك (24/7)
+    # ════════════════════════════════
+    @app_commands.command(name="broadcast-start",
+                          description="بدء بثّ مشترك من قائمة محفوظة أو رابط")
+    async def broadcast_start(self, interaction: discord.Interaction, name: str, source: str):
+        if name in self.stations:
+            return await interaction.response.send_message("❌ يوجد بثّ بهذا الاسم.", ephemeral=True)
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        gid = interaction.guild_id
+        if self._is_url(source):
+            try:
+                items = (await self.dl.expand(source, group=gid)
+                         if self.dl.is_playlist_url(source) else [{"url": source}])
+            except Exception:
+                return await interaction.followup.send("⚠️ الرابط غير متاح أو محجوب.", ephemeral=True)
+        else:
+            tracks = await asyncio.to_thread(self.store.get_tracks,
+                                             gid, interaction.user.id, source)
+            if tracks is None:
+                return await interaction.followup.send("❌ القائمة غير موجودة.", ephemeral=True)
+            # روابط القوائم تُوسَّع هنا؛ البثّ ينزّل كل عنصر كمقطع واحد
+            items = await self._saved_entries(tracks, gid)
+        try:
+            station = BroadcastStation(name, interaction.user.id, items, self.dl,
+                                       ffmpeg=self.bot.ffmpeg_exe,
+                                       on_empty=self._station_exhausted, logger=self.logger)
+        except ValueError as e:
+            return await interaction.followup.send(str(e), ephemeral=True)
+        self.stations[name] = station
+        station.start()
+        self.logger.info(f"[broadcast] بدء {name} ({len(items)} مقطع)")
+        await interaction.followup.send(f"📡 بدأ البثّ **{name}**.", ephemeral=True)
+        if interaction.user.voice and interaction.user.voice.channel:
+            await self._join_station(interaction, station)
+
+    @app_commands.command(name="broadcast-join", description="الاستماع لبثّ مشترك فى هذا السيرفر")
+    async def broadcast_join(self, interaction: discord.Interaction, name: str):
+        station = self.stations.get(name)
+        if station is None:
+            return await interaction.response.send_message("❌ لا يوجد بثّ بهذا الاسم.", ephemeral=True)
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        await self._join_station(interaction, station)
+
+    @app_commands.command(name="broadcast-leave", description="مغادرة البثّ المشترك")
+    async def broadcast_leave(self, interaction: discord.Interaction):
+        st = self._st(interaction.guild_id)
+        if not st.broadcast:
+            return await interaction.response.send_message("السيرفر ليس فى بثّ.", ephemeral=True)
+        st.broadcast = None
+        if st.vc:
+            st.vc.stop()                        # cleanup المستمع يلغى الاشتراك
+        await interaction.response.send_message("👋 غادرنا البثّ.", ephemeral=True)
+
+    @app_commands.command(name="broadcast-stop", description="إيقاف بثّ مشترك (لمن بدأه)")
+    async def broadcast_stop(self, interaction: discord.Interaction, name: str):
+        station = self.stations.get(name)
+        if station is None:
+            return await interaction.response.send_message("❌ لا يوجد بثّ بهذا الاسم.", ephemeral=True)
+        if station.owner != interaction.user.id:
+            return await interaction.response.send_message("فقط من بدأ البثّ يستطيع إيقافه.", ephemeral=True)
+        del self.stations[name]
+        station.close()                         # المستمعون يتلقّون نهاية المصدر
+        await interaction.response.send_message(f"⏹️ أُوقف البثّ **{name}**.", ephemeral=True)
+
+    @app_commands.command(name="broadcast-list", description="البثوث المشتركة الجارية")
+    async def broadcast_list(self, interaction: discord.Interaction):
+        if not self.stations:
+            return await interaction.response.send_message("لا توجد بثوث.", ephemeral=True)
+        lines = [f"📡 `{n}` — {s.stats_snapshot()['now']} ({len(s.listeners)} سيرفر)"
+                 for n, s in self.stations.items()]
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+    async def _join_station(self, interaction: discord.Interaction, station: BroadcastStation):
+        gid = interaction.guild_id
+        if not await self._ensure_voice(interaction):
+            return await interaction.followup.send("🚫 انضم إلى قناة صوتية أولًا.", ephemeral=True)
+        st = self._st(gid)
+        # إيقاف التشغيل المحلّى دون الانتقال للمقطع التالى
+        st.broadcast = station.name
+        st.channel = interaction.channel
+        self.embeds.untrack(gid)
+        self.prefetch.forget(gid)
+        st.queue.clear()
+        if st.vc.is_playing() or st.vc.is_paused():
+            st.vc.stop()
+        name = station.name
+        st.vc.play(station.subscribe(gid), after=lambda e:
+                   self.bot.loop.call_soon_threadsafe(self._station_ended, gid, name))
+        await interaction.followup.send(f"🎧 مشترك فى البثّ **{name}**.", ephemeral=True)
+
+    def _station_ended(self, gid: int, name: str):
+        st = self.states.get(gid)
+        if st and st.broadcast == name:
+            st.broadcast = None
+
+    def _station_exhausted(self, name: str, guild_ids: list[int]):
+        """كل مقاطع البثّ فشلت → حذف المحطّة وإبلاغ السيرفرات المشتركة."""
+        self.stations.pop(name, None)
+        for gid in guild_ids:
+            st = self.states.get(gid)
+            if st and st.channel is not None:
+                self._spawn(self._notify(st.channel,
+                                         f"📡 توقّف البثّ **{name}**: لا توجد مقاطع قابلة للتشغيل."))
+
+    async def _notify(self, channel: discord.abc.Messageable, text: str):
+        try:
+            await channel.send(text)
+        except discord.HTTPException as exc:
+            self.logger.debug(f"تعذّر إرسال التنبيه: {exc}")
+
     # ════════════════════════════════
     #            /stream
     # ════════════════════════════════
@@ -217,6 +782,9 @@ class Player(commands.Cog):
         if not (interaction.user.voice and interaction.user.voice.channel):
             return await interaction.response.send_message(
                 "🚫 انضم إلى قناة صوتية أولًا.", ephemeral=True)
+        if self._st(interaction.guild_id).broadcast:
+            return await interaction.response.send_message(
+                "📡 السيرفر مشترك فى بثّ؛ استخدم /broadcast-leave أولًا.", ephemeral=True)
 
         await interaction.response.defer(thinking=True)
 
@@ -224,8 +792,13 @@ class Player(commands.Cog):
         if self._is_url(input):
             return await self._handle_stream(interaction, input)
 
+        # "قارئ + سورة" من الفهرس المحلّى مباشرة، بلا بحث يوتيوب
+        hit = self.catalog.resolve(input)
+        if hit is not None:
+            return await self._enqueue(interaction, [hit])
+
         # بحث بالكلمات (ephemeral)
-        results = await self._yt_search(input)
+        results = await self._yt_search(input, interaction.guild_id)
         if not results:
             return await interaction.followup.send("❌ لا توجد نتائج.", ephemeral=True)
 
@@ -256,36 +829,102 @@ class Player(commands.Cog):
         v = discord.ui.View(); v.add_item(_SearchSelect(self))
         await interaction.followup.send(embeds=embeds, view=v, ephemeral=True)
 
+    # ════════════════════════════════
+    #         الإكمال التلقائى
+    # ════════════════════════════════
+    # من الذاكرة فقط (بلا شبكة) ليردّ ضمن مهلة Discord (3 ثوانٍ)
+    AUTOCOMPLETE_LIMIT = 25
+
+    @stream.autocomplete("input")
+    @plist_add.autocomplete("input")
+    async def _ac_titles(self, interaction: discord.Interaction,
+                         current: str) -> list[app_commands.Choice[str]]:
+        if self._is_url(current):
+            return []
+        return [app_commands.Choice(name=title[:100], value=value)
+                for title, value in self.titles.search(current, self.AUTOCOMPLETE_LIMIT)]
+
+    @plist_add.autocomplete("name")
+    @plist_import.autocomplete("name")
+    @plist_remove.autocomplete("name")
+    @plist_show.autocomplete("name")
+    @plist_delete.autocomplete("name")
+    @plist_play.autocomplete("name")
+    async def _ac_playlists(self, interaction: discord.Interaction,
+                            current: str) -> list[app_commands.Choice[str]]:
+        names = await asyncio.to_thread(self.store.list_names,
+                                        interaction.guild_id, interaction.user.id)
+        return self._choices(names, current)
+
+    @broadcast_join.autocomplete("name")
+    @broadcast_stop.autocomplete("name")
+    async def _ac_stations(self, interaction: discord.Interaction,
+                           current: str) -> list[app_commands.Choice[str]]:
+        return self._choices(self.stations, current)
+
+    def _choices(self, names, current: str) -> list[app_commands.Choice[str]]:
+        needle = normalize_ar(current)
+        return [app_commands.Choice(name=n[:100], value=n)
+                for n in names if needle in normalize_ar(n)][:self.AUTOCOMPLETE_LIMIT]
+
     # ════════════════════════════════
     #           أوامر الطابور
     # ════════════════════════════════
     @app_commands.command(name="queue", description="عرض قائمة التشغيل")
     async def queue(self, interaction: discord.Interaction):
         st = self._st(interaction.guild_id)
-        if not st.playlist:
+        if not st.queue:
             return await interaction.response.send_message("🔹 الطابور فارغ.", ephemeral=True)
-
-        e = discord.Embed(title="قائمة التشغيل", color=0x2ecc71)
-        for i, itm in enumerate(st.playlist, 1):
-            p = "▶️" if i-1 == st.index else "  "
-            e.add_field(name=f"{p} {i}.", value=itm["title"], inline=False)
-        await interaction.response.send_message(embed=e, ephemeral=True)
+        view = QueueView(self, interaction.guild_id)
+        await interaction.response.send_message(embed=view.render(), view=view, ephemeral=True)
 
     @app_commands.command(name="jump", description="الانتقال لمقطع معيّن")
     async def jump(self, interaction: discord.Interaction, number: int):
         st = self._st(interaction.guild_id)
-        if not 1 <= number <= len(st.playlist):
+        if not 1 <= number <= len(st.queue):
             return await interaction.response.send_message("❌ رقم غير صالح.", ephemeral=True)
-        st.index = number - 2
+        st.queue.jump(number - 1)
+        if st.stalled:
+            await interaction.response.send_message(f"⏩ الانتقال إلى {number}.", ephemeral=True)
+            return await self._play_current(interaction)
         if st.vc: st.vc.stop()
         await interaction.response.send_message(f"⏩ الانتقال إلى {number}.", ephemeral=True)
 
+    @app_commands.command(name="remove", description="حذف مقطع من الطابور برقمه")
+    async def remove(self, interaction: discord.Interaction, number: int):
+        st = self._st(interaction.guild_id)
+        if not 1 <= number <= len(st.queue):
+            return await interaction.response.send_message("❌ رقم غير صالح.", ephemeral=True)
+        if number - 1 == st.queue.pos:
+            return await interaction.response.send_message(
+                "هذا المقطع يعمل الآن؛ استخدم /skip.", ephemeral=True)
+        track = st.queue.remove(number - 1)
+        await interaction.response.send_message(
+            f"🗑️ حُذف: {track.get('title') or track['url']}", ephemeral=True)
+
+    @app_commands.command(name="move", description="نقل مقطع إلى موضع آخر فى الطابور")
+    async def move(self, interaction: discord.Interaction, number: int, to: int):
+        st = self._st(interaction.guild_id)
+        if not (1 <= number <= len(st.queue) and 1 <= to <= len(st.queue)):
+            return await interaction.response.send_message("❌ رقم غير صالح.", ephemeral=True)
+        track = st.queue.move(number - 1, to - 1)
+        await interaction.response.send_message(
+            f"↕️ نُقل {track.get('title') or track['url']} إلى {to}.", ephemeral=True)
+
+    @app_commands.command(name="shuffle", description="خلط المقاطع القادمة")
+    async def shuffle(self, interaction: discord.Interaction):
+        st = self._st(interaction.guild_id)
+        if len(st.queue) - st.queue.pos - 1 < 2:
+            return await interaction.response.send_message("لا يوجد ما يُخلط.", ephemeral=True)
+        st.queue.shuffle()
+        await interaction.response.send_message("🔀 خُلطت المقاطع القادمة.", ephemeral=True)
+
     @app_commands.command(name="restart", description="العودة للبداية")
     async def restart(self, interaction: discord.Interaction):
         st = self._st(interaction.guild_id)
-        if not st.playlist:
+        if not st.queue:
             return await interaction.response.send_message("🔹 الطابور فارغ.", ephemeral=True)
-        st.index = -1
+        st.queue.restart()
         if st.vc: st.vc.stop()
         await interaction.response.send_message("⏮️ عدنا إلى البداية.", ephemeral=True)
 
@@ -296,7 +935,7 @@ class Player(commands.Cog):
             st.vc.resume()
             return await interaction.response.send_message("▶️ استئناف.", ephemeral=True)
 
-        if st.playlist and st.index == -1:
+        if st.queue and (st.queue.pos == -1 or st.stalled):
             await interaction.response.defer(thinking=True)
             return await self._play_current(interaction)
 
@@ -313,105 +952,343 @@ class Player(commands.Cog):
     @app_commands.command(name="skip", description="تخطى الحالى")
     async def skip(self, interaction: discord.Interaction):
         st = self._st(interaction.guild_id)
-        if not st.playlist:
+        if not st.queue:
             return await interaction.response.send_message("🔹 الطابور فارغ.", ephemeral=True)
-        st.index = (st.index + 1) % len(st.playlist)
-        if st.vc: st.vc.stop()
+        if st.vc and (st.vc.is_playing() or st.vc.is_paused()):
+            st.vc.stop()            # الانتقال للتالى يتمّ فى _track_ended
+        elif st.stalled:
+            await interaction.response.send_message("⏭️ تم التخطي.", ephemeral=True)
+            return await self._play_current(interaction)
+        else:
+            st.queue.advance()
         await interaction.response.send_message("⏭️ تم التخطي.", ephemeral=True)
 
     @app_commands.command(name="stop", description="إيقاف ومسح الطابور")
     async def stop(self, interaction: discord.Interaction):
-        st = self._st(interaction.guild_id)
-        st.playlist.clear(); st.index = -1
-        if st.vc:
-            st.vc.stop(); await st.vc.disconnect(); st.vc = None
-        if st.timer: st.timer.cancel()
+        await self._evict(interaction.guild_id, "stop")
         await interaction.response.send_message("⏹️ توقّف كل شيء.", ephemeral=True)
 
+    @app_commands.command(name="stats", description="إحصاءات داخليّة للبوت")
+    async def stats(self, interaction: discord.Interaction):
+        e = discord.Embed(title="📊 إحصاءات", color=0x95a5a6)
+        dl = self.dl.stats_snapshot()
+        e.add_field(name="التنزيل",
+                    value="\n".join(f"{k}: {v}" for k, v in dl.items()), inline=False)
+        sc = self.search_cache.stats_snapshot()
+        e.add_field(name="كاش البحث",
+                    value=" | ".join(f"{k}: {v}" for k, v in sc.items()), inline=False)
+        mon = getattr(self.bot, "loop_monitor", None)
+        if mon is not None:
+            e.add_field(name="حلقة الأحداث",
+                        value="\n".join(f"{k}: {v}" for k, v in mon.stats_snapshot().items()),
+                        inline=False)
+        e.add_field(name="تحديث الرسائل",
+                    value=" | ".join(f"{k}: {v}" for k, v in self.embeds.stats_snapshot().items()),
+                    inline=False)
+        e.add_field(name="التنزيل المسبق",
+                    value=" | ".join(f"{k}: {v}" for k, v in self.prefetch.stats_snapshot().items()),
+                    inline=False)
+        for name, station in self.stations.items():
+            e.add_field(name=f"📡 {name}",
+                        value=" | ".join(f"{k}: {v}" for k, v in station.stats_snapshot().items()),
+                        inline=False)
+        e.add_field(name="الموارد",
+                    value=" | ".join(f"{k}: {v}" for k, v in self._resource_stats().items()),
+                    inline=False)
+        if self.sessions is not None:
+            e.add_field(name="اللقطات والاستئناف",
+                        value=" | ".join(f"{k}: {v}" for k, v in
+                                         {**self.sessions.stats_snapshot(), **self.resume}.items()),
+                        inline=False)
+        e.add_field(name="الفاصل بين المقاطع",
+                    value=" | ".join(f"{k}: {v}" for k, v in self.gaps.items()), inline=False)
+        sch = self.dl.scheduler.stats_snapshot()
+        e.add_field(name="المجدول",
+                    value=f"workers: {sch['workers']} (+{sch['reserved']} now/next) | "
+                          f"running: {sch['running']}\n"
+                          + "\n".join(f"{p}: queued {sch['queued'][p]}, "
+                                      f"wait avg {c['wait_ms_avg']}ms / max {c['wait_ms_max']}ms"
+                                      for p, c in sch["classes"].items()),
+                    inline=False)
+        await interaction.response.send_message(embed=e, ephemeral=True)
+
     # ════════════════════════════════
     #              تشغيل
     # ════════════════════════════════
     async def _handle_stream(self, interaction: discord.Interaction, url: str):
-        st = self._st(interaction.guild_id)
+        if self.dl.is_playlist_url(url):
+            return await self._handle_playlist(interaction, url)
         try:
-            res = await self.dl.download(url)
+            if self.STREAM_WHILE_DOWNLOADING:
+                res = (self.dl.cached(url)
+                       or await self.dl.resolve_stream(url, group=interaction.guild_id))
+            else:
+                res = await self.dl.download(url, group=interaction.guild_id)
         except Exception:
             return await interaction.followup.send("⚠️ المقطع غير متاح أو محجوب.", ephemeral=True)
 
-        st.playlist.append(res if isinstance(res, dict) else res[0])
+        st = self._st(interaction.guild_id)         # بعد الاستخراج: الحالة قد تكون أُخليت
+        st.queue.append(res if isinstance(res, dict) else res[0])
         await interaction.followup.send("✅ أُضيف المقطع.", ephemeral=True)
         if await self._ensure_voice(interaction):
-            if st.index == -1:
+            if st.queue.pos == -1 or st.stalled:
+                await self._play_current(interaction)
+
+    async def _handle_playlist(self, interaction: discord.Interaction, url: str):
+        """قائمة يوتيوب/ساوند كلاود → عناصر خفيفة فى الطابور، تُنزَّل عند الحاجة."""
+        try:
+            entries = await self.dl.expand(url, group=interaction.guild_id)
+        except Exception:
+            return await interaction.followup.send("⚠️ القائمة غير متاحة أو محجوبة.", ephemeral=True)
+        if not entries:
+            return await interaction.followup.send("القائمة فارغة.", ephemeral=True)
+
+        await self._enqueue(interaction, entries)
+
+    async def _enqueue(self, interaction: discord.Interaction, entries: list[dict]):
+        """عناصر خفيفة (url/title/duration) فى الطابور؛ تُجهَّز عند تشغيلها."""
+        st = self._st(interaction.guild_id)
+        st.queue.extend(entries)
+        self.titles.add_many(((e.get("title"), e["url"]) for e in entries), weight=2)
+        msg = (f"✅ أُضيف {len(entries)} مقطع." if len(entries) > 1
+               else f"✅ أُضيف: {entries[0].get('title') or entries[0]['url']}")
+        await interaction.followup.send(msg, ephemeral=True)
+        if await self._ensure_voice(interaction):
+            if st.queue.pos == -1 or st.stalled:
                 await self._play_current(interaction)
 
     async def _play_current(self, interaction: discord.Interaction):
         st = self._st(interaction.guild_id)
-        if not st.playlist:
-            st.index = -1
+        if not st.queue:
+            st.queue.restart()
             return
         if not await self._ensure_voice(interaction):       # تأكد الاتصال
             return
+        st.channel = interaction.channel
+        await self._advance(interaction.guild_id)
 
-        st.index = (st.index + 1) % len(st.playlist)
-        item = st.playlist[st.index]
-        if "path" not in item:
-            item.update(await self.dl.download(item["url"]))
-
-        # prefetch الملفين التاليين
-        async def _prefetch():
-            idx = st.index
-            fut = []
-            for off in (1, 2):
-                nxt = st.playlist[(idx + off) % len(st.playlist)]
-                if "url" in nxt and "path" not in nxt:
-                    fut.append(self.dl.download(nxt["url"]))
-            if fut:
-                await asyncio.gather(*fut, return_exceptions=True)
+    async def _advance(self, gid: int, start: float = 0.0):
+        """
+        الانتقال للمقطع التالى؛ يستخدم المصدر المُجهَّز مسبقًا إن كان مطابقًا.
+        start > 0 → البدء من تلك الثانية (الاستئناف بعد إعادة التشغيل).
+        """
+        st = self._st(gid)
+        primed, st.primed = st.primed, None
+        if st.broadcast:                    # السيرفر مشترك فى بثّ → لا طابور محلّى
+            self._discard(primed)
+            st.ended_at = None
+            return
+        if not st.queue or not await self._voice_ready(st):
+            if not st.queue:
+                st.queue.restart()
+            self._discard(primed)
+            st.ended_at = None
+            return
+
+        st.stalled = False
+        item = src = None
+        failed = []
+        # مقطع محذوف/خاصّ (شائع مع التوسيع الكسول) → تخطّيه للتالى بحدّ أقصى
+        for _ in range(min(self.MAX_SKIPS, len(st.queue))):
+            item = st.queue.advance()
+            if primed and primed[0] is item and not start:
+                src, primed = primed[1], None
+                break
+            try:
+                if "path" not in item:
+                    await self._prepare(item, gid)
+                src = tracked(self._open_source(item, start), start)
+                break
+            except Exception as exc:
+                self.logger.warning(f"[play] تعذّر تشغيل {item['url']}: {exc}")
+                failed.append(item.get("title") or item["url"])
+                start = 0.0
+        self._discard(primed)
+        if failed and st.channel is not None:
+            text = "⚠️ تُخطّى مقطع غير متاح: " + "، ".join(failed)
+            if src is None:
+                text += "\nتوقّف التشغيل؛ استخدم /play أو /skip للمتابعة."
+            self._spawn(self._notify(st.channel, text))
+        if src is None:
+            st.stalled = True
+            st.ended_at = None
+            return
+
+        # تشغيل فعلى (after يُستدعى من خيط الصوت → عودة آمنة للحلقة)
+        st.vc.play(src, after=lambda e:
+                   self.bot.loop.call_soon_threadsafe(self._track_ended, gid, e))
+        if st.ended_at is not None:
+            self._record_gap(time.monotonic() - st.ended_at)
+            st.ended_at = None
 
         if st.prefetch_task and not st.prefetch_task.done():
             st.prefetch_task.cancel()
-        st.prefetch_task = asyncio.create_task(_prefetch())
-
-        # تشغيل فعلى
-        src = discord.FFmpegOpusAudio(item["path"],
-                                      executable=self.bot.ffmpeg_exe,
-                                      before_options="-nostdin",
-                                      options="-vn")
-        st.vc.play(src,
-                   after=lambda e:
-                     self.bot.loop.create_task(self._after(interaction, e)))
-
-        # embed معلومات
-        dur = int(MP3(item["path"]).info.length)
-        emb = (discord.Embed(title=item["title"], color=0x2ecc71)
-               .add_field(name="المدة", value=self._fmt(dur))
-               .set_footer(text=f"{st.index+1}/{len(st.playlist)}"))
-        if st.msg is None:
-            st.msg = await interaction.channel.send(embed=emb)
-        else:
-            await st.msg.edit(embed=emb)
+        st.prefetch_task = asyncio.create_task(self._prefetch(gid))
+
+        # embed معلومات (المدّة من بيانات الاستخراج، بلا قراءة الملف)
+        emb = self._now_playing(gid)
+        if emb is None or st.channel is None:
+            return
+        try:
+            if st.msg is None:
+                st.msg = await st.channel.send(embed=emb)
+            else:
+                await st.msg.edit(embed=emb)
+        except discord.HTTPException as exc:
+            self.logger.warning(f"تعذّر تحديث رسالة التشغيل: {exc}")
+            return
+        # المنقضى يُحدَّث مركزيًّا ضمن ميزانيّة طلبات مشتركة
+        self.embeds.track(gid, st.msg, lambda: self._now_playing(gid), sent=emb)
+
+    async def _prefetch(self, gid: int):
+        """نافذة التنزيل المسبق المتكيّفة، ثم فتح مصدر التالى مسبقًا قبيل انتهاء الحالى."""
+        st = self._st(gid)
+        q = st.queue
+        cur = q.current
+        if cur is None:
+            return
+        self.prefetch.update(gid, q, q.pos, remaining=float(cur.get("duration") or 0))
+        item = q.peek(1)
+        task = self.prefetch.pending(gid, item.get("url", ""))
+        if task is not None:
+            # الإلغاء هنا (تغيّر المقطع) لا يوقف التنزيل نفسه
+            await asyncio.wait([task])
+        # الطابور قد تغيّر (تخطٍّ/حذف/نقل) أثناء الانتظار
+        if q.current is not cur or q.peek(1) is not item:
+            return
+        try:
+            if "path" not in item:
+                await self._prepare(item, gid)
+            if "path" not in item or not await asyncio.to_thread(
+                    opens_in_process, item["path"], item.get("codec", "")):
+                # كل مصدر يشغّل ffmpeg (رابط مباشر أو ملف غير Ogg Opus) يُفتح قرب
+                # النهاية فقط: لا عمليّتا ffmpeg طوال المقطع، ولا اتّصال يطول فينقطع
+                await self._until_remaining(st, cur, self.PRIME_AHEAD)
+            opening = asyncio.ensure_future(asyncio.to_thread(self._open_source, item))
+            try:
+                src = tracked(await asyncio.shield(opening))
+            except asyncio.CancelledError:
+                # الخيط يكمل الفتح رغم الإلغاء → تنظيف المصدر حين يجهز
+                opening.add_done_callback(
+                    lambda f: f.cancelled() or f.exception() or self._discard((item, f.result())))
+                raise
+        except Exception as exc:
+            self.logger.debug(f"[gapless] تعذّر تجهيز المقطع التالى: {exc}")
+            return
+        if q.current is not cur or q.peek(1) is not item:
+            return self._discard((item, src))
+        self._discard(st.primed)
+        st.primed = (item, src)
+
+    async def _until_remaining(self, st: GuildState, cur, seconds: float):
+        """انتظار حتى يبقى من المقطع الحالى seconds ثانية (الإيقاف المؤقّت يؤخّره)."""
+        dur = cur.get("duration") or 0
+        while st.queue.current is cur and st.vc:
+            pos = getattr(st.vc.source, "position", None)
+            if not dur or pos is None:
+                return
+            left = dur - pos - seconds
+            if left <= 0:
+                return
+            await asyncio.sleep(min(left, 30))
+
+    @staticmethod
+    def _discard(primed: tuple | None):
+        if primed:
+            primed[1].cleanup()
+
+    def _record_gap(self, gap: float):
+        ms = gap * 1000
+        g = self.gaps
+        g["transitions"] += 1
+        g["last_ms"] = round(ms, 1)
+        g["max_ms"] = round(max(g["max_ms"], ms), 1)
+        g["avg_ms"] = round(g["avg_ms"] + (ms - g["avg_ms"]) / g["transitions"], 1)
 
-        if st.timer: st.timer.cancel()
-        st.timer = self.bot.loop.create_task(self._ticker(interaction.guild_id))
+    async def _voice_ready(self, st: GuildState) -> bool:
+        if st.vc is None:
+            return False
+        if st.vc.is_connected():
+            return True
+        try:
+            st.vc = await st.vc.channel.connect()
+            return True
+        except discord.ClientException as e:
+            self.logger.warning(f"تعذّر الاتصال بالصوت: {e}")
+            return False
+
+    async def _prepare(self, item: dict, gid: int):
+        """تجهيز العنصر للتشغيل: كاش ← رابط مباشر (مع ملء الكاش) ← تنزيل كامل."""
+        hit = self.dl.cached(item["url"])
+        if hit:
+            merge_media(item, hit)
+            return
+        if not self.STREAM_WHILE_DOWNLOADING:
+            merge_media(item, await self.dl.download(item["url"], group=gid))
+            return
+
+        if time.time() - item.get("resolved_at", 0) > self.STREAM_URL_TTL:
+            merge_media(item, await self.dl.resolve_stream(item["url"], group=gid))
+        self._fill_cache(item, gid)
 
-    async def _after(self, interaction: discord.Interaction, err):
+    def _fill_cache(self, item: dict, gid: int):
+        """تنزيل الملف فى الخلفيّة ليُستخدم فى المرّات القادمة."""
+        async def _run():
+            try:
+                media = await self.dl.download(item["url"], priority=Priority.WARMUP,
+                                               group=gid)
+            except Exception as exc:
+                self.logger.warning(f"[stream] فشل ملء الكاش: {exc}")
+                return
+            if isinstance(media, dict):
+                merge_media(item, media)
+
+        self._spawn(_run())
+
+    def _spawn(self, coro) -> asyncio.Task:
+        """مهمّة خلفيّة بمرجع محفوظ حتى لا يجمعها الـ GC قبل انتهائها."""
+        t = asyncio.create_task(coro)
+        self._bg.add(t); t.add_done_callback(self._bg.discard)
+        return t
+
+    def _open_source(self, item: dict, start: float = 0.0) -> discord.AudioSource:
+        if "path" in item:
+            # Ogg Opus يُقرأ داخل العمليّة بلا ffmpeg؛ غيره عبر ffmpeg كاحتياط
+            return open_source(item["path"], codec=item.get("codec", ""),
+                               ffmpeg=self.bot.ffmpeg_exe, start=start)
+        before = f"-nostdin {self.FFMPEG_RECONNECT}"
+        if item.get("user_agent"):
+            before += f' -user_agent "{item["user_agent"]}"'
+        if start > 0:
+            before += f" -ss {start:.2f}"
+        return discord.FFmpegOpusAudio(item["stream_url"],
+                                       executable=self.bot.ffmpeg_exe,
+                                       before_options=before,
+                                       options="-vn")
+
+    def _track_ended(self, gid: int, err):
         if err:
-            self.logger.error("FFmpeg/Playback Error", exc_info=True)
-        if await self._ensure_voice(interaction):
-            await self._play_current(interaction)
+            self.logger.error(f"FFmpeg/Playback Error: {err}")
+        st = self.states.get(gid)
+        if st is None:                      # أُخليت الحالة (stop/خمول)
+            return
+        st.ended_at = time.monotonic()
+        self._spawn(self._advance(gid))
 
-    async def _ticker(self, gid: int):
-        st = self._st(gid)
-        start = datetime.utcnow()
-        while st.vc and st.vc.is_playing():
-            elapsed = int((datetime.utcnow() - start).total_seconds())
-            emb = st.msg.embeds[0]
-            if len(emb.fields) == 2:
-                emb.set_field_at(1, name="المنقضى", value=self._fmt(elapsed))
-            else:
-                emb.add_field(name="المنقضى", value=self._fmt(elapsed))
-            await st.msg.edit(embed=emb)
-            await asyncio.sleep(10)
+    def _now_playing(self, gid: int) -> discord.Embed | None:
+        """Embed المقطع الحالى؛ None إن توقّف التشغيل (ينتهى التتبّع)."""
+        st = self.states.get(gid)
+        item = st.queue.current if st else None
+        if item is None or not st.vc or not (st.vc.is_playing() or st.vc.is_paused()):
+            return None
+        emb = (discord.Embed(title=item.get("title") or item["url"], color=0x2ecc71)
+               .add_field(name="المدة", value=self._fmt(item.get("duration") or 0))
+               .set_footer(text=f"{st.queue.pos+1}/{len(st.queue)}"))
+        # الموضع من الإطارات المُرسَلة فعلًا → صحيح بعد الإيقاف المؤقّت
+        pos = getattr(st.vc.source, "position", None)
+        if pos:
+            emb.add_field(name="المنقضى", value=self._fmt(pos))
+        return emb
 
 
 async def setup(bot: commands.Bot):
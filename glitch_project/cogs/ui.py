@@ -28,3 +28,52 @@ class PlayerControls(View):
     async def stop(self, button: Button, interaction: discord.Interaction):
         await self.player.stop(interaction)
 
+
+class QueueView(View):
+    """عرض الطابور صفحةً صفحة: تُبنى أسطر الصفحة الظاهرة فقط مهما طال الطابور."""
+    PAGE_SIZE = 15
+    TITLE_MAX = 80
+
+    def __init__(self, player: "Player", guild_id: int, page: int | None = None):
+        super().__init__(timeout=180)
+        self.player = player
+        self.guild_id = guild_id
+        q = player._st(guild_id).queue
+        # الافتراضى: الصفحة التى فيها المقطع الحالى
+        self.page = max(q.pos, 0) // self.PAGE_SIZE if page is None else page
+
+    def render(self) -> discord.Embed:
+        q = self.player._st(self.guild_id).queue
+        pages, rows = q.page(self.page, self.PAGE_SIZE)
+        self.page = min(self.page, pages - 1)
+        lines = []
+        for n, t in rows:
+            mark = "▶️" if n - 1 == q.pos else "▫️"
+            title = (t.get("title") or t["url"])[:self.TITLE_MAX]
+            dur = f" [{self.player._fmt(t['duration'])}]" if t.get("duration") else ""
+            lines.append(f"{mark} **{n}.** {title}{dur}")
+        self.prev.disabled = self.first.disabled = self.page == 0
+        self.next.disabled = self.last.disabled = self.page >= pages - 1
+        return (discord.Embed(title="قائمة التشغيل", description="\n".join(lines) or "—",
+                              color=0x2ecc71)
+                .set_footer(text=f"صفحة {self.page + 1}/{pages} • {len(q)} مقطع"))
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        self.page = max(page, 0)
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @ui.button(emoji="⏮️", style=ButtonStyle.gray)
+    async def first(self, interaction: discord.Interaction, button: Button):
+        await self._show(interaction, 0)
+
+    @ui.button(emoji="◀️", style=ButtonStyle.blurple)
+    async def prev(self, interaction: discord.Interaction, button: Button):
+        await self._show(interaction, self.page - 1)
+
+    @ui.button(emoji="▶️", style=ButtonStyle.blurple)
+    async def next(self, interaction: discord.Interaction, button: Button):
+        await self._show(interaction, self.page + 1)
+
+    @ui.button(emoji="⏭️", style=ButtonStyle.gray)
+    async def last(self, interaction: discord.Interaction, button: Button):
+        await self._show(interaction, 10 ** 9)
@@ -0,0 +1,213 @@
+# modules/audio_sources.py
+import struct
+from typing import BinaryIO, Iterator, Optional
+
+import discord
+
+# رأس صفحة Ogg: OggS, version, flags, granule, serial, seq, crc, عدد المقاطع
+_PAGE = struct.Struct("<4sBBqIIIB")
+
+# مدّة الإطار بالعيّنات (48kHz) حسب config فى بايت TOC — RFC 6716 §3.1
+_FRAME_SAMPLES = (
+    [480, 960, 1920, 2880] * 3          # SILK   (0-11)
+    + [480, 960] * 2                    # Hybrid (12-15)
+    + [120, 240, 480, 960] * 4          # CELT   (16-31)
+)
+
+
+def opus_packet_samples(packet: bytes) -> int:
+    """عدد العيّنات (48kHz) فى حزمة Opus واحدة."""
+    if not packet:
+        return 0
+    toc = packet[0]
+    code = toc & 0x03
+    if code == 0:
+        count = 1
+    elif code in (1, 2):
+        count = 2
+    else:
+        count = packet[1] & 0x3F if len(packet) > 1 else 0
+    return _FRAME_SAMPLES[toc >> 3] * count
+
+
+def iter_ogg_packets(fp: BinaryIO) -> Iterator[bytes]:
+    """تفكيك صفحات Ogg إلى حزم كاملة لأوّل تيّار منطقى فى الملف."""
+    serial: Optional[int] = None
+    partial = b""
+    while True:
+        head = fp.read(_PAGE.size)
+        if not head:
+            return
+        if len(head) < _PAGE.size:
+            raise ValueError("صفحة Ogg مبتورة")
+        magic, _ver, _flags, _gran, sn, _seq, _crc, nseg = _PAGE.unpack(head)
+        if magic != b"OggS":
+            raise ValueError("ليس ملف Ogg صالحًا")
+        lacing = fp.read(nseg)
+        body = fp.read(sum(lacing))
+        if serial is None:
+            serial = sn
+        if sn != serial:
+            continue
+
+        offset = 0
+        for seg in lacing:
+            partial += body[offset:offset + seg]
+            offset += seg
+            if seg < 255:                # نهاية حزمة
+                yield partial
+                partial = b""
+
+
+class OggOpusSource(discord.AudioSource):
+    """
+    مصدر صوت يقرأ حزم Opus مباشرة من ملف Ogg ويسلّمها لـ discord كما هى:
+    • لا عمليّة ffmpeg لكل مقطع ولا فكّ/إعادة ترميز
+    • يتطلّب إطارات 20ms (ما يُنتجه libopus ويوتيوب افتراضيًّا)،
+      وإلا يُستخدم FFmpegOpusAudio عبر open_source
+    """
+    FRAME = 960                          # 20ms @ 48kHz
+    PROBE_PACKETS = 50
+
+    def __init__(self, path: str, start: float = 0.0):
+        self.path = path
+        self._fp = open(path, "rb")
+        self._packets = iter_ogg_packets(self._fp)
+        self.frames = 0                  # عدد الإطارات المُرسَلة (من بداية الملف)
+        try:
+            self._skip_headers()
+            if start > 0:
+                self._seek(start)
+        except Exception:
+            self._fp.close()
+            raise
+
+    def _skip_headers(self) -> None:
+        head = next(self._packets, b"")
+        if not head.startswith(b"OpusHead"):
+            raise ValueError("الملف لا يحوى Opus")
+        tags = next(self._packets, b"")
+        if not tags.startswith(b"OpusTags"):
+            raise ValueError("ترويسة OpusTags مفقودة")
+
+    def _seek(self, start: float) -> None:
+        """
+        القفز إلى start ثانية بتخطّى صفحات Ogg كاملة حسب granule دون قراءة
+        حزمها (الاستئناف بعد إعادة التشغيل). ترويسات Opus تنتهى عند حدّ صفحة.
+        """
+        target = int(start * 48000)
+        reached = 0
+        while True:
+            at = self._fp.tell()
+            head = self._fp.read(_PAGE.size)
+            if len(head) < _PAGE.size:
+                break
+            _magic, _ver, flags, gran, *_rest, nseg = _PAGE.unpack(head)
+            body = sum(self._fp.read(nseg))
+            if gran >= target:
+                self._fp.seek(at)
+                self._packets = iter_ogg_packets(self._fp)
+                if flags & 0x01:         # الصفحة تبدأ ببقيّة حزمة سابقة → تُهمل
+                    next(self._packets, None)
+                break
+            if gran > 0:
+                reached = gran
+            self._fp.seek(body, 1)
+        self.frames = reached // self.FRAME
+
+    @classmethod
+    def probe(cls, path: str) -> bool:
+        """هل يمكن تشغيل الملف مباشرة؟ (Ogg Opus أحادى/ستيريو بإطارات 20ms)"""
+        try:
+            with open(path, "rb") as fp:
+                packets = iter_ogg_packets(fp)
+                head = next(packets, b"")
+                # OpusHead: القنوات (بايت 9) و mapping family (بايت 18)؛
+                # family ≠ 0 = تيّارات متعدّدة لا تُرسَل حزمها كما هى
+                if not head.startswith(b"OpusHead") or head[9] > 2 or head[18] != 0:
+                    return False
+                next(packets, None)      # OpusTags
+                for i, pkt in enumerate(packets):
+                    if i >= cls.PROBE_PACKETS:
+                        break
+                    if opus_packet_samples(pkt) != cls.FRAME:
+                        return False
+            return True
+        except (OSError, ValueError, IndexError, struct.error):
+            return False
+
+    @property
+    def position(self) -> float:
+        return self.frames * 0.02
+
+    def is_opus(self) -> bool:
+        return True
+
+    def read(self) -> bytes:
+        try:
+            pkt = next(self._packets, b"")
+        except (OSError, ValueError):
+            return b""
+        if pkt:
+            self.frames += 1
+        return pkt
+
+    def cleanup(self) -> None:
+        self._fp.close()
+
+
+class TrackedSource(discord.AudioSource):
+    """
+    غلاف يعدّ الإطارات المُسلَّمة لأى مصدر (ffmpeg مثلًا):
+    الموضع = إطارات × 20ms، فلا يتقدّم أثناء الإيقاف المؤقّت.
+    """
+    def __init__(self, inner: discord.AudioSource, start: float = 0.0):
+        self.inner = inner
+        self.frames = int(start / 0.02)
+
+    @property
+    def position(self) -> float:
+        return self.frames * 0.02
+
+    def is_opus(self) -> bool:
+        return self.inner.is_opus()
+
+    def read(self) -> bytes:
+        data = self.inner.read()
+        if data:
+            self.frames += 1
+        return data
+
+    def cleanup(self) -> None:
+        self.inner.cleanup()
+
+
+def tracked(source: discord.AudioSource, start: float = 0.0) -> discord.AudioSource:
+    """
+    مصدر يعرف موضعه: كما هو إن كان يملك position، وإلا مغلّفًا.
+    start = موضع بداية المصدر (بعد -ss) ليبقى الموضع نسبةً لبداية المقطع.
+    """
+    return source if hasattr(source, "position") else TrackedSource(source, start)
+
+
+def opens_in_process(path: str, codec: str = "") -> bool:
+    """هل يُفتح الملف بـ OggOpusSource (بلا عمليّة ffmpeg)؟ — يقرأ الملف، يُستدعى فى خيط."""
+    return codec == "opus" and OggOpusSource.probe(path)
+
+
+def open_source(path: str, *, codec: str = "", ffmpeg: str = "ffmpeg",
+                before_options: str = "-nostdin", start: float = 0.0) -> discord.AudioSource:
+    """
+    فتح ملف مخزّن للتشغيل: Ogg Opus مباشرة داخل العمليّة، وffmpeg كاحتياط
+    بإعادة ترميز دائمًا — ملف Opus رفضه الفحص (إطارات 40/60ms أو تيّارات
+    متعدّدة) لا تصلح حزمه لـ discord، فنسخها (copy) يُخرج صوتًا مشوّهًا.
+    start > 0 → البدء من تلك الثانية (تخطّى صفحات Ogg، أو -ss لـ ffmpeg).
+    """
+    if opens_in_process(path, codec):
+        return OggOpusSource(path, start)
+    if start > 0:
+        before_options += f" -ss {start:.2f}"
+    return discord.FFmpegOpusAudio(path,
+                                   executable=ffmpeg,
+                                   before_options=before_options,
+                                   options="-vn")
@@ -0,0 +1,230 @@
+# modules/broadcast.py
+import asyncio
+import collections
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import discord
+
+from modules.audio_sources import open_source
+from modules.downloader import Downloader, merge_media
+from modules.logger_config import setup_logger
+from modules.scheduler import Priority
+
+Item = Dict[str, object]
+
+SILENCE = b"\xf8\xff\xfe"           # إطار Opus صامت (20ms)
+
+
+class BroadcastListener(discord.AudioSource):
+    """
+    مصدر صوت لسيرفر مشترك فى بثّ: يقرأ الحزم المُرمَّزة مسبقًا من حلقة
+    المحطّة بمؤشّره الخاصّ؛ لا ffmpeg ولا ترميز لكل مستمع.
+    """
+    def __init__(self, station: "BroadcastStation"):
+        self.station = station
+        self.cursor: Optional[int] = None        # يبدأ من اللحظة الحيّة
+
+    def is_opus(self) -> bool:
+        return True
+
+    def read(self) -> bytes:
+        return self.station._read(self)
+
+    def cleanup(self) -> None:
+        self.station.unsubscribe(self)
+
+
+class BroadcastStation:
+    """
+    بثّ واحد → مستمعون كُثر:
+    • خيط ضخّ واحد يقرأ إطارات Opus (20ms) من مصدر واحد بالوقت الحقيقى
+      ويضعها فى حلقة حزم مشتركة؛ كل سيرفر مشترك يقرأ منها
+    • مهمّة تغذية على الحلقة تُنزّل المقطع التالى وتفتح مصدره مسبقًا
+      (Ogg Opus مباشر، وإلا ffmpeg واحد للمحطّة كلها)
+    • الانضمام والمغادرة فى أى لحظة؛ الضخّ يتوقّف حين لا يبقى مستمع
+    • المقطع الفاشل يُعاد بتأخير متضاعف ويُحذف بعد MAX_FAILURES محاولات؛
+      إن لم يبق مقطع قابل للتشغيل تُغلق المحطّة ويُبلَّغ on_empty
+    """
+    FRAME = 0.02
+    BUFFER = 50                     # حزم محفوظة (1s) لامتصاص تفاوت خيوط الصوت
+    MAX_FAILURES = 3
+    RETRY_BASE = 5                  # ثوانٍ قبل أوّل إعادة، ثم تتضاعف
+
+    def __init__(self, name: str, owner: int, items: List[Item], dl: Downloader,
+                 *, ffmpeg: str = "ffmpeg",
+                 on_empty: Optional[Callable[[str, List[int]], None]] = None,
+                 logger=None) -> None:
+        if not items:
+            raise ValueError("لا توجد مقاطع للبثّ.")
+        self.logger = logger or setup_logger(__name__)
+        self.name = name
+        self.owner = owner
+        self.items = items
+        self.dl = dl
+        self.ffmpeg = ffmpeg
+        self.on_empty = on_empty        # (اسم المحطّة، السيرفرات المشتركة) عند نفاد المقاطع
+        self.current: Optional[Item] = None
+        self.listeners: Dict[int, BroadcastListener] = {}     # guild_id → مستمع
+        self._buf: "collections.deque[bytes]" = collections.deque(maxlen=self.BUFFER)
+        self._head = 0                  # رقم تسلسل أوّل حزمة فى _buf
+        self._cond = threading.Condition()
+        self._active = threading.Event()    # يوجد مستمعون
+        self._closed = False
+        self._next: "queue.Queue[Tuple[Item, discord.AudioSource]]" = queue.Queue(maxsize=1)
+        self._feeder: Optional[asyncio.Task] = None
+        self.stats = {"frames": 0, "tracks": 0, "underruns": 0, "dropped": 0,
+                      "failures": 0, "removed": 0}
+
+    # ---------- واجهة ---------- #
+    def start(self) -> None:
+        self._feeder = asyncio.get_running_loop().create_task(self._feed())
+        threading.Thread(target=self._pump, name=f"broadcast-{self.name}",
+                         daemon=True).start()
+
+    def subscribe(self, guild_id: int) -> BroadcastListener:
+        listener = BroadcastListener(self)
+        with self._cond:
+            self.listeners[guild_id] = listener
+            self._active.set()
+        return listener
+
+    def unsubscribe(self, listener: BroadcastListener) -> None:
+        with self._cond:
+            for gid, lst in list(self.listeners.items()):
+                if lst is listener:
+                    del self.listeners[gid]
+            if not self.listeners:
+                self._active.clear()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._active.set()              # إيقاظ خيط الضخّ لينهى
+        if self._feeder:
+            self._feeder.cancel()
+        while not self._next.empty():
+            self._next.get_nowait()[1].cleanup()
+
+    def stats_snapshot(self) -> Dict[str, object]:
+        return {**self.stats, "listeners": len(self.listeners),
+                "now": (self.current or {}).get("title", "—")}
+
+    # ---------- خيط الضخّ ---------- #
+    def _pump(self) -> None:
+        src: Optional[discord.AudioSource] = None
+        try:
+            while not self._closed:
+                if not self._active.is_set():
+                    self._active.wait()
+                    continue
+                start, n = time.perf_counter(), 0
+                while self._active.is_set() and not self._closed:
+                    pkt = src.read() if src else b""
+                    if not pkt:
+                        src = self._switch(src)
+                        pkt = (src.read() if src else b"") or SILENCE
+                    with self._cond:
+                        if len(self._buf) == self._buf.maxlen:
+                            self._head += 1
+                        self._buf.append(pkt)
+                        self._cond.notify_all()
+                    self.stats["frames"] += 1
+                    n += 1
+                    time.sleep(max(0.0, start + n * self.FRAME - time.perf_counter()))
+        finally:
+            if src is not None:
+                src.cleanup()
+
+    def _switch(self, old: Optional[discord.AudioSource]) -> Optional[discord.AudioSource]:
+        """انتهى المقطع → المصدر المفتوح مسبقًا (أو صمت حتى يجهز)."""
+        if old is not None:
+            old.cleanup()
+        try:
+            item, src = self._next.get_nowait()
+        except queue.Empty:
+            return None
+        self.current = item
+        self.stats["tracks"] += 1
+        return src
+
+    # ---------- قراءة المستمع (من خيط صوت السيرفر) ---------- #
+    def _read(self, listener: BroadcastListener) -> bytes:
+        with self._cond:
+            if self._closed:
+                return b""
+            tail = self._head + len(self._buf)
+            if listener.cursor is None:
+                listener.cursor = tail
+            if listener.cursor < self._head:            # مستمع متأخّر → أقدم حزمة متاحة
+                self.stats["dropped"] += self._head - listener.cursor
+                listener.cursor = self._head
+            if listener.cursor >= tail:
+                self._cond.wait(self.FRAME)
+                tail = self._head + len(self._buf)
+                if self._closed:
+                    return b""
+                if listener.cursor >= tail:
+                    self.stats["underruns"] += 1
+                    return SILENCE
+            pkt = self._buf[listener.cursor - self._head]
+            listener.cursor += 1
+            return pkt
+
+    # ---------- التغذية (على حلقة الأحداث) ---------- #
+    async def _feed(self) -> None:
+        fails: Dict[int, int] = {}          # id(item) → محاولات فاشلة متتالية
+        retry_at: Dict[int, float] = {}     # id(item) → أقرب موعد لإعادة المحاولة
+        n = 0
+        while not self._closed:
+            if not self.items:
+                self.logger.warning(f"[broadcast:{self.name}] لا مقاطع قابلة للتشغيل؛ إيقاف")
+                subscribers = list(self.listeners)
+                self.close()
+                if self.on_empty:
+                    self.on_empty(self.name, subscribers)
+                return
+            item = self.items[n % len(self.items)]
+            n += 1
+            now = time.monotonic()
+            if retry_at.get(id(item), 0) > now:
+                # كل المقاطع فى فترة انتظار → النوم حتى أقربها بدل الدوران
+                soonest = min(retry_at.get(id(i), 0) for i in self.items)
+                if soonest > now:
+                    await asyncio.sleep(soonest - now)
+                continue
+            try:
+                if "path" not in item:
+                    merge_media(item, await self.dl.download(item["url"],
+                                                             priority=Priority.NEXT))
+                src = await asyncio.to_thread(open_source, item["path"],
+                                              codec=item.get("codec", ""),
+                                              ffmpeg=self.ffmpeg)
+            except Exception as exc:
+                self.stats["failures"] += 1
+                count = fails[id(item)] = fails.get(id(item), 0) + 1
+                if count >= self.MAX_FAILURES:
+                    self.logger.warning(f"[broadcast:{self.name}] حُذف {item.get('url')} "
+                                        f"بعد {count} محاولات: {exc}")
+                    self.items = [i for i in self.items if i is not item]
+                    fails.pop(id(item)); retry_at.pop(id(item), None)
+                    self.stats["removed"] += 1
+                else:
+                    delay = self.RETRY_BASE * 2 ** (count - 1)
+                    self.logger.warning(f"[broadcast:{self.name}] تخطّى {item.get('url')} "
+                                        f"(إعادة بعد {delay}s): {exc}")
+                    retry_at[id(item)] = time.monotonic() + delay
+                continue
+            fails.pop(id(item), None); retry_at.pop(id(item), None)
+            # ينتظر حتى يأخذ خيط الضخّ المصدر السابق → مقطع واحد جاهز مسبقًا
+            while not self._closed:
+                try:
+                    self._next.put_nowait((item, src))
+                    break
+                except queue.Full:
+                    await asyncio.sleep(0.5)
+            else:
+                src.cleanup()
@@ -1,98 +1,450 @@
 import asyncio
 import hashlib
 import os
-from datetime import datetime, timedelta
+import re
+import time
+from datetime import timedelta
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Callable, Dict, List, Optional, Set, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 from imageio_ffmpeg import get_ffmpeg_exe
-from yt_dlp import YoutubeDL
-from yt_dlp.utils import DownloadError
 
+from modules.extract_pool import ExtractError, ExtractPool, extract_info, search_info
+from modules.http_fetch import (DIRECT_CODECS, HttpFetcher, direct_suffix, read_tags,
+                                title_from_url)
 from modules.logger_config import setup_logger
+from modules.media_cache import MediaCache
+from modules.scheduler import DownloadScheduler, Priority
 
-Media = Dict[str, str]
+Media = Dict[str, Union[str, int]]
 MediaOrPlaylist = Union[Media, List[Media]]
 
+# امتداد الملف → الترميز المخزّن فى الفهرس
+_CODECS = {".opus": "opus", ".ogg": "opus", ".mp3": "mp3", ".m4a": "aac"}
+
+# بارامترات تتبّع لا تغيّر المحتوى → تُحذف قبل المقارنة
+_TRACKING_PARAMS = {"si", "feature", "pp", "ab_channel", "fbclid", "igshid",
+                    "utm_source", "utm_medium", "utm_campaign", "utm_term",
+                    "utm_content"}
+_YT_HOSTS = {"youtube.com", "music.youtube.com", "youtu.be"}
+# روابط قوائم التشغيل: يوتيوب (list=) وساوند كلاود (sets)
+_RX_PLAYLIST = re.compile(r"[?&]list=|/playlist\b|soundcloud\.com/[^/]+/sets/", re.I)
+# رابط فيديو بعينه (حتى لو حمل list=) → الفيديو وحده كما يفعل noplaylist
+_RX_VIDEO = re.compile(r"[?&]v=[\w-]|youtu\.be/[\w-]|/shorts/[\w-]", re.I)
+# كاش النسخة الأولى: downloads/<sha256(url)>.mp3 بلا أى فهرس
+_RX_LEGACY = re.compile(r"[0-9a-f]{64}\.mp3")
+
+
+def normalize_url(url: str) -> str:
+    """
+    مفتاح موحّد للرابط: يتجاهل www/m، بارامترات التتبّع، الـ fragment،
+    ويحوّل صيغ يوتيوب المختصرة (youtu.be / shorts) إلى watch?v=.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for pre in ("www.", "m."):
+        if host.startswith(pre):
+            host = host[len(pre):]
+    path = parts.path
+    query = parse_qsl(parts.query, keep_blank_values=True)
+
+    if host in _YT_HOSTS:
+        vid = None
+        if host == "youtu.be":
+            vid = path.strip("/")
+        elif path.startswith("/shorts/"):
+            vid = path[len("/shorts/"):].strip("/")
+        if vid:
+            query = [("v", vid)] + query
+            path = "/watch"
+        host = "youtube.com"
+        scheme = "https"
+    else:
+        scheme = parts.scheme.lower() or "https"
+
+    query = sorted((k, v) for k, v in query if k not in _TRACKING_PARAMS)
+    return urlunsplit((scheme, host, path.rstrip("/") or "/", urlencode(query), ""))
+
+
+def merge_media(item: dict, media: Media) -> dict:
+    """
+    تحديث عنصر طابور بنتيجة تنزيل/حلّ، مع إبقاء عنوانه إن كان معروفًا
+    (عنوان الفهرس أو المتجر أدقّ من اسم ملف أو وسم ID3).
+    """
+    title = item.get("title")
+    item.update(media)
+    if title and title != "—":
+        item["title"] = title
+    if "path" in media:
+        item.pop("stream_url", None)
+    return item
+
 
 class Downloader:
     """
     تنزيل صوتيات مع:
     • كاش باسم sha256(url) لمنع التنزيل المكرّر
-    • تنظيف تلقائى: 3 أيام للملفات الفردية، 10 أيام لملفات قوائم التشغيل
-    • تنزيل متوازٍ (يُستخدم من Player)
+    • حفظ الصوت بترميزه الأصلى (Opus) أو ترميز واحد إلى Ogg Opus،
+      مع ترحيل تدريجى لكاش mp3 القديم
+    • حصّة قرص بالبايت مع إخلاء LRU/LFU فور كل تنزيل، دون المساس
+      بالملفات قيد التشغيل أو فى الطوابير
+    • تنزيل متوازٍ عبر مجدول عامّ بالأولويّات (يُستخدم من Player)
+    • دمج الطلبات المتزامنة لنفس الرابط فى تنزيل واحد مشترك (single-flight)
+    • فهرس دائم (MediaCache) يجعل إصابة الكاش فوريّة بلا yt-dlp،
+      مع إعادة تحقّق اختياريّة فى الخلفيّة
     """
-    SINGLE_TTL   = timedelta(days=3)
-    PLAYLIST_TTL = timedelta(days=10)
+    REVALIDATE_AFTER = timedelta(days=1)
+    ORPHAN_AGE       = timedelta(hours=6)
+    OPUS_KBPS        = 128
+    MIGRATE_PAUSE    = 5           # ثوانٍ بين ملفات ترحيل mp3 القديمة
 
-    def __init__(self, logger=None, download_dir: str = "downloads"):
+    def __init__(self, logger=None, download_dir: str = "downloads",
+                 *, revalidate: bool = False, max_bytes: int = 0,
+                 policy: str = "lru", migrate_mp3: bool = False,
+                 workers: int = 3, extract_mode: str = "thread",
+                 recycle_after: int = 50):
         self.logger = logger or setup_logger(__name__)
         self.dir = Path(download_dir)
         self.dir.mkdir(exist_ok=True)
         self.ffmpeg_exe = get_ffmpeg_exe()
+        self.cache = MediaCache(self.dir, self.logger,
+                                max_bytes=max_bytes, policy=policy)
+        self.revalidate = revalidate
+        self._revalidating: set = set()
+        # دالّة تُرجِع مسارات الملفات المحميّة من الإخلاء (يضبطها Player)
+        self.protected: Callable[[], Set[str]] = set
+        # كل استخراج yt-dlp يمرّ عبر مجدول عامّ بالأولويّات، ثم خيط أو عمليّة
+        self.scheduler = DownloadScheduler(workers, self.logger)
+        self.pool = ExtractPool(extract_mode, workers + DownloadScheduler.RESERVED,
+                                recycle_after, self.logger)
+        # روابط ملفات الصوت المباشرة → aiohttp مباشرة بلا yt-dlp ولا ترميز
+        self.http = HttpFetcher(self.logger)
+
+        # مفتاح الرابط الموحّد → مهمّة التنزيل الجارية
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"requests": 0, "downloads": 0, "direct": 0,
+                      "coalesced": 0, "revalidated": 0}
 
-        # ■ إنشاء مهمّة التنظيف فقط إذا كانت هناك حلقة أحداث تعمل
+        # ■ إزالة الملفات اليتيمة (وترحيل mp3 القديم) إذا كانت هناك حلقة أحداث تعمل
         try:
-            asyncio.get_running_loop().create_task(self._cleanup())
+            loop = asyncio.get_running_loop()
+            loop.create_task(self._sweep_orphans(migrate=migrate_mp3))
         except RuntimeError:
             # سيتم إنشاء المهمّة لاحقًا عندما تبدأ الحلقة (مثلاً داخل bot.start)
             pass
 
     # ---------- واجهة عامّة ---------- #
-    async def download(self, url: str) -> MediaOrPlaylist:
-        """تنزيل الملف إن لم يكن فى الكاش."""
-        info = await asyncio.to_thread(self._extract, url)
+    async def download(self, url: str, *, priority: Priority = Priority.NOW,
+                       group: int = 0) -> MediaOrPlaylist:
+        """
+        تنزيل الملف إن لم يكن فى الكاش.
+        الطلبات المتزامنة لنفس الرابط تنتظر نفس المهمّة بدل تنزيله مرّة أخرى
+        (مع رفع أولويّتها إن كان الطالب الجديد أعجل)؛
+        إلغاء أحد المنتظرين لا يلغى التنزيل المشترك.
+        """
+        self.stats["requests"] += 1
+        key = normalize_url(url)
+
+        entry = self.cache.get(key) or await self._link_legacy(url, key)
+        if entry is not None:
+            self._maybe_revalidate(key, url, entry)
+            return self._media_from_entry(entry)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            self.logger.debug(f"[dl] دمج طلب مكرّر: {key}")
+            self.scheduler.promote(key, priority)
+            return self._copy(await asyncio.shield(task))
+
+        self.stats["downloads"] += 1
+        task = asyncio.get_running_loop().create_task(
+            self._download(url, key, priority, group))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finish(key, t))
+        return self._copy(await asyncio.shield(task))
+
+    @staticmethod
+    def is_playlist_url(url: str) -> bool:
+        url = url or ""
+        return bool(_RX_PLAYLIST.search(url)) and not _RX_VIDEO.search(url)
+
+    async def expand(self, url: str, *, group: int = 0) -> List[Media]:
+        """
+        توسيع قائمة تشغيل باستخراج مسطّح (بلا تنزيل ولا حلّ صيغ):
+        عناصر خفيفة (url, title, duration) تُنزَّل لاحقًا عند الحاجة.
+        """
+        info = await self._extract(url, download=False, flat=True,
+                                   priority=Priority.NOW, group=group)
+        if info.get("_type") != "playlist":
+            return [self._flat_entry(info, url)]
+        return [m for m in map(self._flat_entry, info.get("entries") or []) if m]
+
+    async def probe(self, url: str, *, priority: Priority = Priority.WARMUP,
+                    group: int = 0) -> Media:
+        """بيانات وصفيّة فقط (عنوان/مدّة/معرّف) — من الكاش إن وُجد، وإلا باستخراج مسطّح."""
+        hit = self.cached(url)
+        if hit is not None:
+            return {"url": hit["url"], "title": hit["title"],
+                    "duration": hit["duration"], "media_id": None}
+        if direct_suffix(url):
+            return {"url": url, "title": title_from_url(url), "duration": 0, "media_id": None}
+        info = await self._extract(url, download=False, flat=True,
+                                   priority=priority, group=group)
         if info.get("_type") == "playlist":
-            return [self._build_media(e, is_playlist=True) for e in info["entries"]]
-        return self._build_media(info, is_playlist=False)
+            raise RuntimeError("الرابط قائمة تشغيل وليس مقطعًا واحدًا")
+        return self._flat_entry(info, url)
+
+    @staticmethod
+    def _flat_entry(e: Optional[dict], url: str = "") -> Optional[Media]:
+        if not e:
+            return None
+        link = e.get("webpage_url") or e.get("url") or url
+        if link and not link.startswith("http") and e.get("ie_key") == "Youtube":
+            link = f"https://www.youtube.com/watch?v={link}"
+        if not link:
+            return None
+        return {"url": link,
+                "title": e.get("title") or "—",
+                "duration": int(e.get("duration") or 0),
+                "media_id": e.get("id")}
+
+    async def search(self, query: str, limit: int, *, group: int = 0) -> List[dict]:
+        """بحث يوتيوب مسطّح: العنوان والمدّة والصورة دون حلّ صيغ أى فيديو."""
+        info = await self._run(search_info, query, limit,
+                               priority=Priority.NOW, group=group)
+        return [e for e in info.get("entries") or [] if e]
+
+    def cached(self, url: str) -> Optional[Media]:
+        """إصابة كاش فوريّة دون أى تنزيل (None إن لم يكن مخزّنًا)."""
+        entry = self.cache.get(normalize_url(url))
+        return self._media_from_entry(entry) if entry is not None else None
+
+    async def resolve_stream(self, url: str, *, group: int = 0) -> Media:
+        """
+        استخراج رابط الوسائط المباشر دون تنزيل، ليبدأ التشغيل خلال ثوانٍ
+        بينما يمتلئ الكاش فى الخلفيّة.
+        """
+        if direct_suffix(url):
+            # الرابط نفسه قابل للتشغيل؛ لا حاجة لأى استخراج
+            return {"url": url, "title": title_from_url(url), "duration": 0,
+                    "stream_url": url, "user_agent": "", "resolved_at": int(time.time())}
+        info = await self._extract(url, download=False,
+                                   priority=Priority.NOW, group=group)
+        if info.get("_type") == "playlist":
+            info = next(iter(info.get("entries") or []), None) or {}
+        if not info.get("url"):
+            raise RuntimeError("تعذّر إيجاد رابط تشغيل مباشر")
+        return {
+            "url": info.get("original_url") or info.get("webpage_url") or url,
+            "title": info.get("title") or "—",
+            "duration": int(info.get("duration") or 0),
+            "stream_url": info["url"],
+            "user_agent": (info.get("http_headers") or {}).get("User-Agent", ""),
+            "resolved_at": int(time.time()),
+        }
+
+    def stats_snapshot(self) -> Dict[str, int]:
+        cache = {f"cache_{k}": v for k, v in self.cache.stats_snapshot().items()}
+        pool = {f"extract_{k}": v for k, v in self.pool.stats.items()}
+        return {**self.stats, "inflight": len(self._inflight), **cache, **pool}
+
+    async def close(self) -> None:
+        await self.scheduler.close()
+        self.pool.close()
+        await self.http.close()
 
     # ---------- داخلى ---------- #
-    def _extract(self, url: str) -> dict:
-        ydl_opts = {
+    def _run(self, fn, *args, priority: Priority, group: int = 0,
+             key: Optional[str] = None):
+        """تنفيذ دالّة عامل (extract_pool) عبر المجدول العامّ ثم المجمّع."""
+        return self.scheduler.submit(
+            lambda: self.pool.run(fn, *args),
+            priority=priority, group=group, key=key)
+
+    @staticmethod
+    def _copy(res: MediaOrPlaylist) -> MediaOrPlaylist:
+        # كل منتظر يأخذ نسخته الخاصّة حتى لا تتشارك الطوابير نفس الـ dict
+        return [dict(m) for m in res] if isinstance(res, list) else dict(res)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # قراءة الاستثناء تمنع تحذير "never retrieved" إذا أُلغى كل المنتظرين
+        if not task.cancelled():
+            task.exception()
+
+    async def _download(self, url: str, key: str, priority: Priority,
+                        group: int) -> MediaOrPlaylist:
+        if direct_suffix(url):
+            return await self._download_direct(url, key, priority, group)
+        info = await self._extract(url, priority=priority, group=group, key=key)
+        if info.get("_type") == "playlist":
+            res = [await self._build_media(e, is_playlist=True) for e in info["entries"]]
+        else:
+            res = await self._build_media(info, is_playlist=False, key=key)
+        # الملفات الجديدة لم تصل للطابور بعد → تُحمى صراحةً من إخلاء هذا التنزيل
+        placed = res if isinstance(res, list) else [res]
+        await self._enforce_quota({m["path"] for m in placed})
+        await self.cache.save()
+        return res
+
+    @staticmethod
+    def _media_from_entry(entry: dict) -> Media:
+        return {
+            "url": entry["url"],
+            "title": entry.get("title") or "—",
+            "path": entry["path"],
+            "duration": entry.get("duration") or 0,
+            "codec": entry.get("codec") or "",
+            "is_playlist_item": "0",
+        }
+
+    # ---- إعادة تحقّق فى الخلفيّة ----
+    def _maybe_revalidate(self, key: str, url: str, entry: dict) -> None:
+        if not self.revalidate or key in self._revalidating:
+            return
+        age = time.time() - float(entry.get("checked") or 0)
+        if age < self.REVALIDATE_AFTER.total_seconds():
+            return
+        self._revalidating.add(key)
+        asyncio.get_running_loop().create_task(self._revalidate(key, url))
+
+    async def _revalidate(self, key: str, url: str) -> None:
+        """تحديث العنوان/المدّة دون تنزيل؛ الملف المخزّن يبقى صالحًا للتشغيل."""
+        entry = self.cache.get(key)
+        if entry is not None and entry.get("direct"):
+            return await self._revalidate_direct(key, url, entry)
+        try:
+            info = await self._extract(url, download=False, priority=Priority.WARMUP)
+            self.cache.touch_checked(key, title=info.get("title") or "—",
+                                     duration=int(info.get("duration") or 0))
+            self.stats["revalidated"] += 1
+            await self.cache.save()
+        except Exception as exc:
+            self.logger.warning(f"[cache] فشل التحقّق من {url}: {exc}")
+        finally:
+            self._revalidating.discard(key)
+
+    # ---- ملفات صوت مباشرة ----
+    async def _download_direct(self, url: str, key: str, priority: Priority,
+                               group: int) -> Media:
+        """جلب الملف كما هو (بلا yt-dlp ولا ffmpeg)؛ المدّة من ترويسته عبر mutagen."""
+        suffix = direct_suffix(url)
+        path = self._hash_name(key, suffix)
+        res = await self.scheduler.submit(lambda: self.http.fetch(url, path),
+                                          priority=priority, group=group, key=key)
+        self.stats["direct"] += 1
+        return await self._store_direct(url, key, path, res)
+
+    async def _store_direct(self, url: str, key: str, path: Path, res: dict) -> Media:
+        tags = await asyncio.to_thread(read_tags, str(path))
+        media = {
+            "url": url,
+            "title": tags.get("title") or title_from_url(url),
+            "path": str(path),
+            "duration": int(tags.get("duration") or 0),
+            "codec": DIRECT_CODECS[path.suffix],
+            "is_playlist_item": "0",
+        }
+        self.cache.put({key}, {k: media[k] for k in ("url", "title", "path",
+                                                     "duration", "codec")}
+                       | {"size": res["size"], "direct": True, "etag": res.get("etag"),
+                          "last_modified": res.get("last_modified")})
+        await self._enforce_quota({str(path)})
+        await self.cache.save()
+        return media
+
+    async def _revalidate_direct(self, key: str, url: str, entry: dict) -> None:
+        """طلب شرطى (ETag/Last-Modified): 304 → لا شيء يُنزَّل."""
+        try:
+            res = await self.scheduler.submit(
+                lambda: self.http.fetch(url, Path(entry["path"]), etag=entry.get("etag"),
+                                        last_modified=entry.get("last_modified")),
+                priority=Priority.WARMUP, key=key)
+            if res["status"] == "not_modified":
+                self.cache.touch_checked(key)
+                await self.cache.save()
+            else:
+                await self._store_direct(url, key, Path(entry["path"]), res)
+            self.stats["revalidated"] += 1
+        except Exception as exc:
+            self.logger.warning(f"[cache] فشل التحقّق من {url}: {exc}")
+        finally:
+            self._revalidating.discard(key)
+
+    async def _extract(self, url: str, download: bool = True, flat: bool = False, *,
+                       priority: Priority, group: int = 0,
+                       key: Optional[str] = None) -> dict:
+        try:
+            return await self._run(extract_info, url, self._ydl_opts(flat), download,
+                                   priority=priority, group=group, key=key)
+        except ExtractError as exc:
+            self.logger.error(f"yt-dlp error: {exc}")
+            raise RuntimeError("المقطع غير متاح أو محجوب")
+
+    def _ydl_opts(self, flat: bool) -> dict:
+        return {
             "quiet": True,
-            "format": "bestaudio/best",
+            # رابط فيديو داخل قائمة → الفيديو وحده؛ القوائم تمرّ عبر expand()
+            "noplaylist": not flat,
+            "extract_flat": "in_playlist" if flat else False,
+            # نفضّل Opus الأصلى (webm) لنحفظه كما هو دون أى ترميز
+            "format": "bestaudio[acodec=opus]/bestaudio/best",
             "ffmpeg_location": self.ffmpeg_exe,
             "outtmpl": str(self.dir / "%(id)s.%(ext)s"),
             "cachedir": False,
             "postprocessors": [
                 {
+                    # Opus → نسخ الحزم إلى حاوية Ogg بلا ترميز،
+                    # غير ذلك → ترميز واحد فقط إلى Ogg Opus
                     "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "192",
+                    "preferredcodec": "opus",
+                    "preferredquality": str(self.OPUS_KBPS),
                 }
             ],
         }
-        try:
-            with YoutubeDL(ydl_opts) as ydl:
-                return ydl.extract_info(url, download=True)
-        except DownloadError as exc:
-            self.logger.error(f"yt-dlp error: {exc}", exc_info=True)
-            raise RuntimeError("المقطع غير متاح أو محجوب")
 
     # ---- كاش ----
-    def _hash_name(self, url: str, suffix: str = ".mp3") -> Path:
+    def _hash_name(self, url: str, suffix: str = ".opus") -> Path:
         h = hashlib.sha256(url.encode()).hexdigest()
         return self.dir / f"{h}{suffix}"
 
-    def _build_media(self, info: dict, *, is_playlist: bool) -> Media:
-        url  = info.get("original_url") or info.get("webpage_url")
-        path = self._hash_name(url)
+    @staticmethod
+    def _codec_of(path: Path) -> str:
+        return _CODECS.get(path.suffix.lower(), path.suffix.lstrip("."))
 
-        # إذا لم يكن موجودًا فى الكاش → انسخ/انقل إليه الملف الذى نزّلته yt-dlp
-        if not path.exists():
-            src = self._choose_audio_path(info)
-            os.replace(src, path)
-
-        # تحديث mtime ليساعد وظيفة التنظيف على حساب العمر بدقة
-        os.utime(path, None)
+    async def _build_media(self, info: dict, *, is_playlist: bool,
+                           key: Optional[str] = None) -> Media:
+        url  = info.get("original_url") or info.get("webpage_url")
+        src  = self._choose_audio_path(info)
+        path = self._hash_name(url, Path(src).suffix)
+        size = await asyncio.to_thread(self._place_file, Path(src), path)
 
-        return {
+        media = {
             "url": url,
             "title": info.get("title") or "—",
             "path": str(path),
-            # نستخدم امتداد اسم الملف للتمييز لاحقًا فى التنظيف
+            "duration": int(info.get("duration") or 0),
+            "codec": self._codec_of(path),
             "is_playlist_item": "1" if is_playlist else "0",
         }
+        # تسجيل الملف فى الفهرس تحت الرابط المطلوب والرابط الأصلى معًا
+        keys = {normalize_url(url)} | ({key} if key else set())
+        self.cache.put(keys, {k: media[k] for k in ("url", "title", "path",
+                                                    "duration", "codec")}
+                       | {"size": size})
+        return media
+
+    @staticmethod
+    def _place_file(src: Path, path: Path) -> int:
+        """نقل ملف yt-dlp إلى اسمه فى الكاش (فى خيط) وإرجاع حجمه."""
+        # إذا لم يكن موجودًا فى الكاش → انقل إليه الملف الذى نزّلته yt-dlp
+        if not path.exists():
+            os.replace(src, path)
+        elif src != path:
+            src.unlink(missing_ok=True)
+        return path.stat().st_size
 
     def _choose_audio_path(self, info: dict) -> str:
         path = info.get("requested_downloads", [{}])[0].get("filepath")
@@ -100,21 +452,115 @@ class Downloader:
             return path
         raise RuntimeError("تعذّر إيجاد الملف الصوتى بعد التنزيل")
 
-    # ---- تنظيف تلقائى ----
-    async def _cleanup(self):
-        while True:
-            now = datetime.utcnow()
+    async def _link_legacy(self, url: str, key: str) -> Optional[dict]:
+        """
+        ملف كاش قديم لهذا الرابط (sha256 للرابط الخام، mp3 أو بعد ترحيله إلى opus)
+        سُجِّل بلا مفاتيح عند الاستيراد → يُربط بمفتاحه بدل إعادة تنزيله.
+        """
+        for suffix in (".opus", ".mp3"):
+            path = str(self._hash_name(url, suffix))
+            if self.cache.link(key, path, url=url) is None:
+                continue
+            entry = self.cache.get(key)
+            if entry is not None and not entry.get("title"):
+                tags = await asyncio.to_thread(read_tags, path)
+                self.cache.touch_checked(key, title=tags.get("title") or "—",
+                                         duration=int(tags.get("duration") or 0))
+            return entry
+        return None
+
+    # ---- حصّة القرص ----
+    async def _enforce_quota(self, keep: Set[str] = frozenset()) -> None:
+        """keep: ملفات وُضعت للتوّ ولم تُسلَّم للطالب بعد (أحدثها بلا إصابات فى LFU)."""
+        victims = self.cache.select_victims(self.protected() | keep)
+        if not victims:
+            return
+        self.logger.debug(f"[cache] إخلاء {len(victims)} ملف لتبقى الحصّة تحت الحدّ")
+        await asyncio.to_thread(self._unlink_all, victims)
+
+    @staticmethod
+    def _unlink_all(paths: List[str]) -> None:
+        for p in paths:
+            try:
+                os.unlink(p)
+            except OSError:
+                pass
+
+    async def _sweep_orphans(self, migrate: bool = False) -> None:
+        """
+        حذف ملفات قديمة لا يعرفها الفهرس (بقايا تنزيلات منقطعة أو نسخ سابقة).
+        ملفات كاش النسخة الأولى (<sha256>.mp3) لا تُحذف بل تُستورد للفهرس بلا
+        مفاتيح، ثم يبدأ ترحيلها (بعد الاستيراد حتى يراها الترحيل).
+        """
+        known = self.cache.paths() | {str(self.cache.file)}
+        cutoff = time.time() - self.ORPHAN_AGE.total_seconds()
+
+        def _sweep():
+            n, legacy = 0, []
             for p in self.dir.iterdir():
-                if not p.is_file():
+                if not p.is_file() or str(p) in known:
                     continue
+                try:
+                    st = p.stat()
+                    if _RX_LEGACY.fullmatch(p.name):
+                        legacy.append((str(p), st.st_size, st.st_mtime))
+                    elif st.st_mtime < cutoff:
+                        p.unlink()
+                        n += 1
+                except OSError:
+                    pass
+            return n, legacy
 
-                age = now - datetime.utcfromtimestamp(p.stat().st_mtime)
+        removed, legacy = await asyncio.to_thread(_sweep)
+        if removed:
+            self.logger.info(f"[cache] حُذف {removed} ملف يتيم")
+        for path, size, mtime in legacy:
+            # mtime = آخر استخدام فى النسخة الأولى (كانت تحدّثه عند كل طلب)
+            self.cache.adopt(path, {"size": size, "codec": "mp3",
+                                    "last_access": mtime, "checked": 0})
+        if legacy:
+            self.logger.info(f"[cache] استُورد {len(legacy)} ملف mp3 من الكاش القديم")
+        await self._enforce_quota()
+        await self.cache.save()
+        if migrate:
+            await self._migrate_mp3()
 
-                # نفرّق بين الملف الفردى والعنصر داخل قائمة تشغيل عبر metadata
-                ttl = self.PLAYLIST_TTL if ".pl" in p.stem else self.SINGLE_TTL
-                if age > ttl:
-                    try:
-                        p.unlink()
-                    except Exception:
-                        pass
-            await asyncio.sleep(24 * 3600)   # مرّة يوميًا
+    # ---- ترحيل كاش mp3 القديم ----
+    async def _migrate_mp3(self) -> None:
+        """
+        تحويل ملفات mp3 المخزّنة سابقًا إلى Ogg Opus، ملفًا واحدًا كل مرّة.
+        ملفات mp3 تبقى صالحة للتشغيل (عبر ffmpeg) حتى يصلها الدور،
+        والملفات قيد التشغيل تُؤجَّل إلى تشغيل لاحق.
+        """
+        # ملفات الروابط المباشرة تبقى كما هى (تُعاد مقارنتها بالأصل عبر ETag)
+        legacy = [p for p, e in self.cache.entries()
+                  if e.get("codec") == "mp3" and not e.get("direct")]
+        if not legacy:
+            return
+        self.logger.info(f"[cache] ترحيل {len(legacy)} ملف mp3 إلى Opus")
+        done = 0
+        for old in legacy:
+            if old in self.protected():
+                continue
+            new = str(Path(old).with_suffix(".opus"))
+            proc = await asyncio.create_subprocess_exec(
+                self.ffmpeg_exe, "-nostdin", "-y", "-loglevel", "error",
+                "-i", old, "-vn", "-c:a", "libopus", "-b:a", f"{self.OPUS_KBPS}k",
+                new,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE)
+            _, err = await proc.communicate()
+            if proc.returncode != 0:
+                self.logger.warning(f"[cache] فشل ترحيل {old}: {err.decode(errors='ignore')}")
+                Path(new).unlink(missing_ok=True)
+                continue
+            size = await asyncio.to_thread(os.path.getsize, new)
+            if old in self.protected() or not self.cache.relocate(
+                    old, new, codec="opus", size=size):
+                Path(new).unlink(missing_ok=True)
+                continue
+            await asyncio.to_thread(Path(old).unlink, missing_ok=True)
+            done += 1
+            await self.cache.save()
+            await asyncio.sleep(self.MIGRATE_PAUSE)
+        self.logger.info(f"[cache] اكتمل ترحيل {done}/{len(legacy)} ملف")
@@ -0,0 +1,154 @@
+# modules/embed_updater.py
+import asyncio
+import heapq
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import discord
+
+from modules.logger_config import setup_logger
+
+Render = Callable[[], Optional[discord.Embed]]
+
+
+class EmbedUpdater:
+    """
+    مُحدِّث مركزى لرسائل "يُشغَّل الآن" بدل مهمّة لكل سيرفر:
+    • كل رسالة لها موعد تحديث (كل interval ثانية)، وتُخدم الأقدم موعدًا أولًا
+    • ميزانيّة طلبات عامّة (token bucket بمعدّل rate طلب/ثانية) لكل السيرفرات
+    • لا تعديل إن لم يتغيّر المحتوى (الإيقاف المؤقّت مثلًا)
+    • تراجع تكيّفى: عند 429 (أو تعديل بطئ = انتظار حدّ داخلى) يُنصَّف المعدّل
+      ويتوقّف الإرسال مدّة retry_after، ثم يعود المعدّل تدريجيًّا
+    render() يعيد الـ Embed الحالى أو None لإيقاف التتبّع.
+    """
+    TICK = 0.5              # ثوانٍ بين جولات الجدولة
+    MIN_RATE = 0.2          # طلب/ثانية
+    RECOVER_STEP = 0.1      # زيادة المعدّل بعد كل تعديل ناجح
+    SLOW_EDIT = 2.0         # تعديل أبطأ من هذا = حدّ معدّل داخلى فى discord.py
+
+    def __init__(self, rate: float = 5.0, interval: float = 10.0, logger=None) -> None:
+        self.logger = logger or setup_logger(__name__)
+        self.max_rate = max(self.MIN_RATE, rate)
+        self.rate = self.max_rate
+        self.interval = interval
+        # key → [message, render, آخر محتوى مُرسَل, تسلسل الموعد الصالح]
+        self._items: Dict[Hashable, list] = {}
+        self._due: List[Tuple[float, int, Hashable]] = []      # heap: (موعد, تسلسل, key)
+        self._seq = 0
+        self._tokens = self.max_rate
+        self._last_fill = time.monotonic()
+        self._paused_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"edits": 0, "skipped": 0, "rate_limited": 0, "failed": 0,
+                      "max_delay_ms": 0.0}
+
+    # ---------- واجهة ---------- #
+    def track(self, key: Hashable, message: discord.Message, render: Render, *,
+              sent: Optional[discord.Embed] = None) -> None:
+        """بدء/تحديث تتبّع رسالة؛ sent = ما أُرسل للتوّ حتى لا يُعاد إرساله."""
+        self._items[key] = [message, render, sent.to_dict() if sent else None, 0]
+        self._push(key, time.monotonic() + self.interval)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def untrack(self, key: Hashable) -> None:
+        self._items.pop(key, None)      # مدخله فى الـ heap يُهمل عند خروجه
+
+    def close(self) -> None:
+        self._items.clear()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def stats_snapshot(self) -> Dict[str, object]:
+        return {**self.stats, "tracked": len(self._items), "rate": round(self.rate, 2)}
+
+    # ---------- داخلى ---------- #
+    def _push(self, key: Hashable, when: float) -> None:
+        # مواعيد سابقة لنفس المفتاح تبقى فى الـ heap لكنها تُهمل (تسلسل قديم)
+        self._seq += 1
+        self._items[key][3] = self._seq
+        heapq.heappush(self._due, (when, self._seq, key))
+
+    def _refill(self, now: float) -> None:
+        # السعة ≥ 1 حتى لا يتوقّف الإرسال تمامًا بمعدّلات أقلّ من طلب/ثانية
+        self._tokens = min(max(1.0, self.rate),
+                           self._tokens + (now - self._last_fill) * self.rate)
+        self._last_fill = now
+
+    async def _run(self) -> None:
+        while self._items:
+            await asyncio.sleep(self.TICK)
+            now = time.monotonic()
+            if now < self._paused_until:
+                continue
+            self._refill(now)
+            batch = []
+            while self._due and self._due[0][0] <= now and self._tokens >= 1:
+                when, seq, key = heapq.heappop(self._due)
+                if key not in self._items or self._items[key][3] != seq:
+                    continue
+                self.stats["max_delay_ms"] = round(
+                    max(self.stats["max_delay_ms"], (now - when) * 1000), 1)
+                if self._prepare(key):
+                    self._tokens -= 1
+                    batch.append(key)
+            if batch:
+                await asyncio.gather(*(self._edit(k) for k in batch))
+
+    def _prepare(self, key: Hashable) -> bool:
+        """إعادة الجدولة، وTrue إن كان المحتوى تغيّر ويستحقّ طلبًا."""
+        _, render, last, _ = self._items[key]
+        try:
+            emb = render()
+        except Exception as exc:
+            self.logger.warning(f"[embeds] فشل تجهيز التحديث: {exc}")
+            emb = None
+        if emb is None:
+            del self._items[key]
+            return False
+        self._push(key, time.monotonic() + self.interval)
+        data = emb.to_dict()
+        if data == last:
+            self.stats["skipped"] += 1
+            return False
+        self._items[key][2] = data
+        return True
+
+    async def _edit(self, key: Hashable) -> None:
+        item = self._items.get(key)
+        if item is None:
+            return
+        msg, _, data, _ = item
+        t0 = time.monotonic()
+        try:
+            await msg.edit(embed=discord.Embed.from_dict(data))
+        except discord.NotFound:
+            self._items.pop(key, None)          # الرسالة حُذفت
+            return
+        except discord.HTTPException as exc:
+            if exc.status == 429:
+                self._backoff(getattr(exc, "retry_after", None) or 1.0)
+            else:
+                self.stats["failed"] += 1
+            self._forget(key)
+            return
+        self.stats["edits"] += 1
+        if time.monotonic() - t0 > self.SLOW_EDIT:
+            self._backoff(0.0)
+        else:
+            self.rate = min(self.max_rate, self.rate + self.RECOVER_STEP)
+
+    def _forget(self, key: Hashable) -> None:
+        """المحتوى لم يصل → لا نعتبره مُرسَلًا فيُعاد فى الموعد التالى."""
+        item = self._items.get(key)
+        if item is not None:
+            item[2] = None
+
+    def _backoff(self, retry_after: float) -> None:
+        self.stats["rate_limited"] += 1
+        self.rate = max(self.MIN_RATE, self.rate / 2)
+        self._tokens = 0
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        self.logger.warning(f"[embeds] حدّ معدّل، المعدّل الآن {self.rate:.2f}/ث "
+                            f"وتوقّف {retry_after:.1f}ث")
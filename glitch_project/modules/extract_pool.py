@@ -0,0 +1,91 @@
+# modules/extract_pool.py
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import DownloadError
+
+from modules.logger_config import setup_logger
+
+
+class ExtractError(RuntimeError):
+    """خطأ yt-dlp بصيغة نصّيّة قابلة للنقل بين العمليّات."""
+
+
+# ---------- دوال العامل (على مستوى الوحدة لتكون قابلة للـ pickle) ---------- #
+def extract_info(url: str, opts: dict, download: bool) -> dict:
+    try:
+        with YoutubeDL(opts) as ydl:
+            return ydl.sanitize_info(ydl.extract_info(url, download=download))
+    except DownloadError as exc:
+        raise ExtractError(str(exc)) from None
+
+
+def search_info(query: str, limit: int) -> dict:
+    opts = {"quiet": True, "extract_flat": True, "skip_download": True,
+            "cachedir": False}
+    return extract_info(f"ytsearch{limit}:{query}", opts, False)
+
+
+class ExtractPool:
+    """
+    تنفيذ استخراج yt-dlp خارج حلقة الأحداث:
+    • mode="thread"  → asyncio.to_thread (الافتراضى)
+    • mode="process" → عمليّات منفصلة لا تنافس الحلقة وخيوط الصوت على الـ GIL،
+      يُعاد تدوير كل عامل بعد recycle_after مهمّة، والرجوع للخيوط عند العطل
+    النتائج دائمًا dict عاديّة (sanitize_info) فى الوضعين.
+    """
+    MODES = ("thread", "process")
+
+    def __init__(self, mode: str = "thread", workers: int = 2,
+                 recycle_after: int = 50, logger=None) -> None:
+        if mode not in self.MODES:
+            raise ValueError(f"وضع استخراج غير معروف: {mode}")
+        self.logger = logger or setup_logger(__name__)
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.recycle_after = recycle_after
+        self._proc: Optional[ProcessPoolExecutor] = None
+        self.stats = {"process_jobs": 0, "thread_jobs": 0, "fallbacks": 0}
+        if mode == "process":
+            self._proc = self._new_pool()
+
+    def _new_pool(self) -> Optional[ProcessPoolExecutor]:
+        opts = {"max_workers": self.workers,
+                "mp_context": multiprocessing.get_context("spawn")}
+        try:
+            try:
+                return ProcessPoolExecutor(**opts,
+                                           max_tasks_per_child=self.recycle_after or None)
+            except TypeError:
+                # بايثون < 3.11: لا max_tasks_per_child → عمليّات بلا إعادة تدوير
+                self.logger.warning("[extract] إعادة تدوير العمّال تتطلّب بايثون 3.11+")
+                self.recycle_after = 0
+                return ProcessPoolExecutor(**opts)
+        except (OSError, ValueError, NotImplementedError) as exc:
+            self.logger.warning(f"[extract] تعذّر إنشاء مجمّع العمليّات، سنستخدم الخيوط: {exc}")
+            self.mode = "thread"
+            return None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._proc is not None:
+            try:
+                res = await asyncio.get_running_loop().run_in_executor(self._proc, fn, *args)
+                self.stats["process_jobs"] += 1
+                return res
+            except BrokenProcessPool as exc:
+                # عامل انهار (ذاكرة/إشارة) → مجمّع جديد، وهذه المهمّة عبر خيط
+                self.logger.error(f"[extract] انهار مجمّع العمليّات: {exc}")
+                self.stats["fallbacks"] += 1
+                self._proc.shutdown(wait=False, cancel_futures=True)
+                self._proc = self._new_pool()
+        self.stats["thread_jobs"] += 1
+        return await asyncio.to_thread(fn, *args)
+
+    def close(self) -> None:
+        if self._proc is not None:
+            self._proc.shutdown(wait=False, cancel_futures=True)
+            self._proc = None
@@ -0,0 +1,193 @@
+# modules/http_fetch.py
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import unquote, urlsplit
+
+import aiohttp
+from mutagen import File as MutagenFile
+
+from modules.logger_config import setup_logger
+
+# امتدادات ملفات صوت تُجلب كما هى دون yt-dlp ولا إعادة ترميز
+DIRECT_CODECS = {".mp3": "mp3", ".opus": "opus", ".ogg": "ogg", ".m4a": "aac",
+                 ".aac": "aac", ".flac": "flac", ".wav": "wav"}
+
+
+def direct_suffix(url: str) -> Optional[str]:
+    """امتداد الملف إن كان الرابط ملف صوت مباشرًا، وإلا None."""
+    suffix = Path(urlsplit(url).path).suffix.lower()
+    return suffix if suffix in DIRECT_CODECS else None
+
+
+def title_from_url(url: str) -> str:
+    return unquote(Path(urlsplit(url).path).stem) or "—"
+
+
+def read_tags(path: str) -> Dict[str, object]:
+    """المدّة (والعنوان إن وُجد) من ترويسة الملف — تُستدعى فى خيط."""
+    try:
+        audio = MutagenFile(path, easy=True)
+    except Exception:
+        return {}
+    if audio is None:
+        return {}
+    meta: Dict[str, object] = {"duration": int(getattr(audio.info, "length", 0) or 0)}
+    titles = (audio.tags or {}).get("title") if audio.tags is not None else None
+    if titles:
+        meta["title"] = str(titles[0])
+    return meta
+
+
+class HttpFetcher:
+    """
+    جلب ملفات الصوت المباشرة عبر جلسة aiohttp واحدة مشتركة:
+    • اتصالات مُعاد استخدامها (keep-alive) بحدّ عامّ ولكل مضيف
+    • استئناف التنزيل المنقطع بطلب Range مع If-Range (الملف الجزئى + ملف تعريفه)
+    • إعادة تحقّق شرطيّة بـ ETag / Last-Modified → 304 بلا إعادة تنزيل
+    الكتابة على القرص فى خيط، بدفعات كبيرة حتى لا تُعطِّل الحلقة.
+    """
+    LIMIT = 32
+    LIMIT_PER_HOST = 8
+    CHUNK = 256 * 1024
+    FLUSH_BYTES = 1024 * 1024
+    RETRIES = 3
+    TIMEOUT = aiohttp.ClientTimeout(total=None, connect=10, sock_read=30)
+
+    def __init__(self, logger=None) -> None:
+        self.logger = logger or setup_logger(__name__)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.stats = {"fetched": 0, "resumed": 0, "not_modified": 0, "bytes": 0}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.TIMEOUT,
+                connector=aiohttp.TCPConnector(limit=self.LIMIT,
+                                               limit_per_host=self.LIMIT_PER_HOST,
+                                               ttl_dns_cache=300))
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, url: str, dest: Path, *, etag: Optional[str] = None,
+                    last_modified: Optional[str] = None) -> Dict[str, object]:
+        """
+        تنزيل url إلى dest. مع etag/last_modified يكون الطلب شرطيًّا:
+        {"status": "not_modified"} إن لم يتغيّر، وإلا الملف الجديد.
+        """
+        part = dest.with_name(dest.name + ".part")
+        info_file = dest.with_name(dest.name + ".part.json")
+        for attempt in range(1, self.RETRIES + 1):
+            try:
+                return await self._fetch_once(url, dest, part, info_file,
+                                              etag, last_modified)
+            except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError,
+                    asyncio.TimeoutError) as exc:
+                if attempt == self.RETRIES:
+                    raise RuntimeError(f"تعذّر تنزيل الملف: {exc}") from None
+                self.logger.debug(f"[http] انقطاع ({attempt}/{self.RETRIES})، استئناف: {exc}")
+                await asyncio.sleep(attempt)
+        raise AssertionError("unreachable")
+
+    async def _fetch_once(self, url: str, dest: Path, part: Path, info_file: Path,
+                          etag: Optional[str], last_modified: Optional[str]) -> Dict[str, object]:
+        have, validator = await asyncio.to_thread(self._partial_state, part, info_file)
+        headers = {}
+        if have and validator:
+            headers["Range"] = f"bytes={have}-"
+            headers["If-Range"] = validator
+        elif etag:
+            headers["If-None-Match"] = etag
+        elif last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        async with self._get_session().get(url, headers=headers) as resp:
+            if resp.status == 304:
+                self.stats["not_modified"] += 1
+                return {"status": "not_modified"}
+            if resp.status == 416 and "Range" in headers:
+                # الجزء قد يكون الملف كاملًا (توقّف قبل _commit) → يُحسم بعد الإغلاق
+                total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+                stale = not (total.isdigit() and int(total) == have)
+            elif resp.status not in (200, 206):
+                raise RuntimeError(f"HTTP {resp.status}")
+            else:
+                return await self._receive(resp, dest, part, info_file, have)
+
+        if stale:
+            # جزء لا يطابق الملف الحالى → حذفه والتنزيل من الصفر
+            self.logger.debug(f"[http] جزء قديم ({have}/{total or '?'}) أُهمل: {url}")
+            await asyncio.to_thread(self._drop_partial, part, info_file)
+            return await self._fetch_once(url, dest, part, info_file, etag, last_modified)
+        meta = await asyncio.to_thread(self._partial_meta, info_file)
+        await asyncio.to_thread(self._commit, part, info_file, dest)
+        self.stats["fetched"] += 1
+        return {"status": "downloaded", "size": have, **meta}
+
+    async def _receive(self, resp: aiohttp.ClientResponse, dest: Path, part: Path,
+                       info_file: Path, have: int) -> Dict[str, object]:
+        """كتابة جسم ردّ 200 (من البداية) أو 206 (استئناف) ثم نقل الملف لمكانه."""
+        meta = {"etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified")}
+        resume = resp.status == 206
+        if resume:
+            self.stats["resumed"] += 1
+        else:
+            have = 0
+            await asyncio.to_thread(
+                info_file.write_text, json.dumps(meta), "utf-8")
+
+        start = have
+        fp = await asyncio.to_thread(open, part, "ab" if resume else "wb")
+        try:
+            buf = bytearray()
+            async for chunk in resp.content.iter_chunked(self.CHUNK):
+                buf += chunk
+                if len(buf) >= self.FLUSH_BYTES:
+                    await asyncio.to_thread(fp.write, bytes(buf))
+                    have += len(buf)
+                    buf.clear()
+            if buf:
+                await asyncio.to_thread(fp.write, bytes(buf))
+                have += len(buf)
+        finally:
+            await asyncio.to_thread(fp.close)
+
+        await asyncio.to_thread(self._commit, part, info_file, dest)
+        self.stats["fetched"] += 1
+        self.stats["bytes"] += have - start
+        return {"status": "downloaded", "size": have, **meta}
+
+    @staticmethod
+    def _partial_state(part: Path, info_file: Path):
+        """(بايتات موجودة، محقّق If-Range) لملف جزئى سابق إن وُجد."""
+        try:
+            size = part.stat().st_size
+            meta = json.loads(info_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return 0, None
+        return size, meta.get("etag") or meta.get("last_modified")
+
+    @staticmethod
+    def _partial_meta(info_file: Path) -> Dict[str, Optional[str]]:
+        try:
+            meta = json.loads(info_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+        return {"etag": meta.get("etag"), "last_modified": meta.get("last_modified")}
+
+    @staticmethod
+    def _drop_partial(part: Path, info_file: Path) -> None:
+        part.unlink(missing_ok=True)
+        info_file.unlink(missing_ok=True)
+
+    @staticmethod
+    def _commit(part: Path, info_file: Path, dest: Path) -> None:
+        os.replace(part, dest)
+        info_file.unlink(missing_ok=True)
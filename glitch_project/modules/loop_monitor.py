@@ -0,0 +1,83 @@
+# modules/loop_monitor.py
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+
+from modules.logger_config import setup_logger
+
+
+class LoopLagMonitor:
+    """
+    مراقب تأخّر حلقة الأحداث:
+    • نبضة على الحلقة كل interval ثانية
+    • خيط مراقبة مستقلّ؛ إن تأخّرت النبضة أكثر من threshold يلتقط مكدّس
+      خيط الحلقة فى تلك اللحظة (أى الـ callback المُعطِّل) ويسجّله
+    • عدّاد للتوقّفات وأقصى تأخّر
+    """
+    STACK_DEPTH = 8
+
+    def __init__(self, threshold: float = 0.25, interval: float = 0.1,
+                 logger=None) -> None:
+        self.logger = logger or setup_logger(__name__)
+        self.threshold = threshold
+        self.interval = interval
+        self._last = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self.stats = {"stalls": 0, "max_lag_ms": 0.0, "last_culprit": ""}
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        threading.Thread(target=self._watch, name="loop-lag-watchdog",
+                         daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def stats_snapshot(self) -> Dict[str, object]:
+        return dict(self.stats)
+
+    # ---------- داخلى ---------- #
+    async def _beat(self) -> None:
+        while True:
+            self._last = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self) -> None:
+        stalled_since: Optional[float] = None
+        while not self._stop.wait(self.interval):
+            behind = time.monotonic() - self._last - self.interval
+            if behind > self.threshold and stalled_since is None:
+                stalled_since = self._last
+                self.stats["stalls"] += 1
+                stack = self._loop_stack()
+                if stack:
+                    top = stack[-1]
+                    self.stats["last_culprit"] = f"{top.name} ({top.filename}:{top.lineno})"
+                self.logger.warning(
+                    f"[loop] الحلقة متوقّفة منذ {behind * 1000:.0f}ms، المكدّس الحالى:\n"
+                    + "".join(stack.format()))
+            elif stalled_since is not None and behind <= self.threshold:
+                # النبضة عادت → مدّة التوقّف الفعليّة
+                lag = (self._last - stalled_since - self.interval) * 1000
+                self.stats["max_lag_ms"] = round(max(self.stats["max_lag_ms"], lag), 1)
+                self.logger.warning(f"[loop] انتهى التوقّف بعد {lag:.0f}ms")
+                stalled_since = None
+
+    def _loop_stack(self) -> traceback.StackSummary:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return traceback.StackSummary()
+        return traceback.StackSummary.from_list(
+            traceback.extract_stack(frame)[-self.STACK_DEPTH:])
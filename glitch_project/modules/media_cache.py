@@ -0,0 +1,212 @@
+# modules/media_cache.py
+import asyncio
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from modules.logger_config import setup_logger
+
+Entry = Dict[str, object]
+
+
+class MediaCache:
+    """
+    فهرس دائم للملفات المخزّنة (manifest.json داخل مجلد التنزيل):
+    • مفتاح = الرابط الموحّد → مسار الملف → path, title, duration, codec, size
+    • يسمح بالردّ من الكاش مباشرة دون إنشاء YoutubeDL أو أى طلب شبكة
+    • حصّة بالبايت مع إخلاء LRU أو LFU من الفهرس نفسه (بلا مسح للمجلد)
+    • الكتابة ذرّيّة (ملف مؤقّت + os.replace) حتى لا يتلف الفهرس عند الانهيار
+    """
+    POLICIES = ("lru", "lfu")
+
+    def __init__(self, directory: Path, logger=None, *,
+                 max_bytes: int = 0, policy: str = "lru") -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"سياسة إخلاء غير معروفة: {policy}")
+        self.logger = logger or setup_logger(__name__)
+        self.file = Path(directory) / "manifest.json"
+        self.max_bytes = max_bytes          # 0 = بلا حدّ
+        self.policy = policy
+
+        # path → entry ، key → path
+        self._entries: Dict[str, Entry] = {}
+        self._keys: Dict[str, str] = {}
+        self._load()
+        self.total_bytes = sum(int(e.get("size") or 0) for e in self._entries.values())
+
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes_evicted": 0}
+
+    # ---------- تحميل / حفظ ---------- #
+    def _load(self) -> None:
+        if not self.file.exists():
+            return
+        try:
+            data = json.loads(self.file.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            self.logger.warning(f"[cache] تعذّر قراءة الفهرس، سيُعاد بناؤه: {exc}")
+            return
+        if "entries" not in data:
+            # الصيغة الأولى: key → entry مباشرة
+            for key, entry in data.items():
+                self._entries.setdefault(entry["path"], entry)
+                self._keys[key] = entry["path"]
+            return
+        self._entries = data["entries"]
+        self._keys = {k: p for k, p in data["keys"].items() if p in self._entries}
+
+    def snapshot(self) -> Optional[str]:
+        """تسلسل الفهرس إن تغيّر (على الحلقة، حتى لا يتغيّر أثناء القراءة)."""
+        if not self._dirty:
+            return None
+        self._dirty = False
+        return json.dumps({"entries": self._entries, "keys": self._keys},
+                          ensure_ascii=False)
+
+    def write(self, data: str) -> None:
+        """كتابة ذرّيّة لنسخة مسلسلة (تُستدعى من خيط منفصل)."""
+        with self._lock:
+            tmp = self.file.with_suffix(".tmp")
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, self.file)
+
+    async def save(self) -> None:
+        data = self.snapshot()
+        if data is not None:
+            await asyncio.to_thread(self.write, data)
+
+    # ---------- عمليات ---------- #
+    def get(self, key: str) -> Optional[Entry]:
+        """إرجاع المدخل إن كان ملفّه ما زال موجودًا بنفس الحجم، وإلا حذفه."""
+        path = self._keys.get(key)
+        entry = self._entries.get(path) if path else None
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            size = -1
+        if size != entry.get("size"):
+            self.logger.debug(f"[cache] مدخل تالف/ناقص أُزيل: {key}")
+            self._drop(path)
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        entry["last_access"] = time.time()
+        entry["hits"] = int(entry.get("hits") or 0) + 1
+        self._dirty = True
+        return entry
+
+    def put(self, keys: Iterable[str], entry: Entry) -> None:
+        path = str(entry["path"])
+        old = self._entries.get(path)
+        if old is not None:
+            self.total_bytes -= int(old.get("size") or 0)
+        now = time.time()
+        self._entries[path] = {**entry, "checked": now, "last_access": now,
+                               "hits": int(old.get("hits") or 0) if old else 0}
+        self.total_bytes += int(entry.get("size") or 0)
+        for k in keys:
+            self._keys[k] = path
+        self._dirty = True
+
+    def adopt(self, path: str, entry: Entry) -> bool:
+        """
+        تسجيل ملف بلا مفاتيح (كاش ما قبل الفهرس): يدخل الحصّة والإخلاء والترحيل
+        فورًا، ويُربط برابطه عند أوّل طلب له (link).
+        """
+        if path in self._entries:
+            return False
+        self._entries[path] = {"url": None, "title": None, "duration": 0,
+                               "hits": 0, **entry, "path": path}
+        self.total_bytes += int(entry.get("size") or 0)
+        self._dirty = True
+        return True
+
+    def link(self, key: str, path: str, **meta) -> Optional[Entry]:
+        """ربط مفتاح بمدخل موجود (بلا تحقّق من الملف؛ get يتحقّق)."""
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        entry.update(meta)
+        self._keys[key] = path
+        self._dirty = True
+        return entry
+
+    def touch_checked(self, key: str, **meta) -> None:
+        entry = self._entries.get(self._keys.get(key, ""))
+        if entry is None:
+            return
+        entry.update(meta, checked=time.time())
+        self._dirty = True
+
+    def discard(self, key: str) -> None:
+        path = self._keys.get(key)
+        if path:
+            self._drop(path)
+
+    def _drop(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.total_bytes -= int(entry.get("size") or 0)
+        for k in [k for k, p in self._keys.items() if p == path]:
+            del self._keys[k]
+        self._dirty = True
+
+    def paths(self) -> Set[str]:
+        return set(self._entries)
+
+    def entries(self) -> List[Tuple[str, Entry]]:
+        return list(self._entries.items())
+
+    def relocate(self, old: str, new: str, **meta) -> bool:
+        """نقل مدخل إلى ملف جديد (مثلاً بعد تحويل الترميز) مع بقاء مفاتيحه وإحصاءاته."""
+        entry = self._entries.pop(old, None)
+        if entry is None:
+            return False
+        self.total_bytes += int(meta.get("size") or 0) - int(entry.get("size") or 0)
+        self._entries[new] = {**entry, **meta, "path": new}
+        for k, p in self._keys.items():
+            if p == old:
+                self._keys[k] = new
+        self._dirty = True
+        return True
+
+    # ---------- إخلاء ---------- #
+    def select_victims(self, protected: Set[str]) -> List[str]:
+        """
+        اختيار الملفات التى يجب حذفها لتعود الحصّة تحت الحدّ، وإزالتها من الفهرس.
+        الملفات المحميّة (قيد التشغيل أو فى الطابور) لا تُخلى أبدًا.
+        """
+        if not self.max_bytes or self.total_bytes <= self.max_bytes:
+            return []
+        if self.policy == "lfu":
+            rank = lambda e: (int(e.get("hits") or 0), float(e.get("last_access") or 0))
+        else:
+            rank = lambda e: float(e.get("last_access") or 0)
+
+        candidates = sorted((p for p in self._entries if p not in protected),
+                            key=lambda p: rank(self._entries[p]))
+        victims = []
+        for path in candidates:
+            if self.total_bytes <= self.max_bytes:
+                break
+            size = int(self._entries[path].get("size") or 0)
+            self._drop(path)
+            victims.append(path)
+            self.stats["evictions"] += 1
+            self.stats["bytes_evicted"] += size
+        return victims
+
+    def stats_snapshot(self) -> Dict[str, int]:
+        return {**self.stats, "files": len(self._entries),
+                "bytes": self.total_bytes, "quota": self.max_bytes}
+
+    def __len__(self) -> int:
+        return len(self._entries)
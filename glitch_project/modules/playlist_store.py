@@ -1,47 +1,371 @@
 # modules/playlist_store.py
+import asyncio
 import json
+import os
+import sqlite3
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 _STORE = Path("playlists.json")
+_DB    = Path("playlists.db")
 
+Track  = Dict[str, object]      # {"url", "title", "duration", "media_id"}
+Record = Dict[str, object]      # {"owner": user_id(str), "tracks": [Track,…]}
+_META  = ("title", "duration", "media_id")
 
+
+def _track(url: str, title: Optional[str] = None, duration: Optional[int] = None,
+           media_id: Optional[str] = None) -> Track:
+    return {"url": url, "title": title, "duration": duration, "media_id": media_id}
+
+
+def _upgrade(rec: Dict) -> Dict:
+    """سجلّ بالصيغة القديمة (urls فقط) → tracks بلا بيانات وصفيّة."""
+    if "tracks" not in rec:
+        rec["tracks"] = [_track(u) for u in rec.pop("urls", [])]
+    return rec
+
+
+# ════════════════════════════════
+#        واجهات التخزين
+# ════════════════════════════════
+class JsonBackend:
+    """
+    التخزين القديم: ملف JSON واحد فى الذاكرة.
+    الحفظ يتمّ خارج حلقة الأحداث، مع دمج التعديلات المتقاربة فى كتابة واحدة.
+    العمليات تُستدعى من خيوط (asyncio.to_thread) → قفل على البيانات، والحفظ
+    يُجدوَل على الحلقة.
+    فهرس ثانوى owner → {(guild, name)} يُحدَّث مع كل إنشاء/حذف.
+    """
+    SAVE_DELAY = 1.0        # ثوانٍ
+
+    def __init__(self, path: Path = _STORE) -> None:
+        self.path = Path(path)
+        # guild_id(str) -> { name(str): {"owner": user_id(str), "tracks": [Track,…]} }
+        self._data: Dict[str, Dict[str, Record]] = (
+            json.loads(self.path.read_text(encoding="utf-8"))
+            if self.path.exists() else {}
+        )
+        for pls in self._data.values():
+            for rec in pls.values():
+                _upgrade(rec)
+        self._lock = threading.Lock()           # كتابة الملف
+        self._mu = threading.Lock()             # البيانات فى الذاكرة
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        try:
+            self._loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        self._owners: Dict[str, Set[Tuple[str, str]]] = {}
+        for g, pls in self._data.items():
+            for n, rec in pls.items():
+                self._owners.setdefault(rec["owner"], set()).add((g, n))
+
+    # ---------- حفظ ---------- #
+    def _flush(self) -> None:
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if self._loop is None or self._loop.is_closed():
+                # لا حلقة (سكربتات/اختبارات) → كتابة فوريّة
+                return self._write(self._dump())
+            # من خيط عامل → الجدولة على الحلقة لتُدمج مع ما يليها
+            return self._loop.call_soon_threadsafe(self._schedule_save)
+        self._schedule_save()
+
+    def _schedule_save(self) -> None:
+        if self._save_handle is None:
+            self._save_handle = self._loop.call_later(self.SAVE_DELAY, self._save_now)
+
+    def _dump(self) -> str:
+        # بلا indent حتى يُستخدم مُسلسِل C السريع
+        with self._mu:
+            return json.dumps(self._data, ensure_ascii=False)
+
+    def _save_now(self) -> None:
+        self._save_handle = None
+        asyncio.get_running_loop().run_in_executor(None, self._write, self._dump())
+
+    def _write(self, data: str) -> None:
+        with self._lock:
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, self.path)
+
+    # ---------- قراءة ---------- #
+    def get(self, guild: str, name: str) -> Optional[Record]:
+        with self._mu:
+            rec = self._data.get(guild, {}).get(name)
+            if rec is None:
+                return None
+            return {"owner": rec["owner"], "tracks": [dict(t) for t in rec["tracks"]]}
+
+    def guild_names(self, guild: str) -> List[str]:
+        with self._mu:
+            return list(self._data.get(guild, {}))
+
+    def owned_by(self, owner: str) -> List[Tuple[str, str]]:
+        with self._mu:
+            return list(self._owners.get(owner, ()))
+
+    def titled_tracks(self) -> List[Tuple[str, str]]:
+        with self._mu:
+            return list({(t["title"], t["url"]) for pls in self._data.values()
+                         for rec in pls.values() for t in rec["tracks"] if t.get("title")})
+
+    # ---------- كتابة ---------- #
+    def create(self, guild: str, name: str, owner: str) -> None:
+        with self._mu:
+            pls = self._data.setdefault(guild, {})
+            if name in pls:
+                raise ValueError("اسم هذه القائمة مستخدم بالفعل فى هذا السيرفر.")
+            pls[name] = {"owner": owner, "tracks": []}
+            self._owners.setdefault(owner, set()).add((guild, name))
+        self._flush()
+
+    def append(self, guild: str, name: str, track: Track) -> None:
+        with self._mu:
+            self._data[guild][name]["tracks"].append(dict(track))
+        self._flush()
+
+    def extend(self, guild: str, name: str, tracks: List[Track]) -> None:
+        with self._mu:
+            self._data[guild][name]["tracks"].extend(dict(t) for t in tracks)
+        self._flush()
+
+    def remove_at(self, guild: str, name: str, index: int) -> None:
+        with self._mu:
+            self._data[guild][name]["tracks"].pop(index)
+        self._flush()
+
+    def update_meta(self, guild: str, name: str, url: str, meta: Dict) -> None:
+        with self._mu:
+            rec = self._data.get(guild, {}).get(name)
+            if rec is None:
+                return
+            for t in rec["tracks"]:
+                if t["url"] == url:
+                    t.update(meta)
+        self._flush()
+
+    def delete(self, guild: str, name: str) -> None:
+        with self._mu:
+            rec = self._data[guild].pop(name)
+            owned = self._owners.get(rec["owner"])
+            if owned is not None:
+                owned.discard((guild, name))
+                if not owned:
+                    del self._owners[rec["owner"]]
+        self._flush()
+
+
+class SqliteBackend:
+    """
+    SQLite بوضع WAL:
+    • كل تعديل معاملة مستقلّة صغيرة (لا إعادة كتابة للملف كاملًا)
+    • ذرّى: الانهيار أثناء الكتابة لا يُفقد أى قائمة
+    • قرّاء متزامنون: اتصال لكل خيط (asyncio.to_thread)، والقراءة لا تنتظر الكاتب
+    • استيراد لمرّة واحدة من playlists.json إن وُجد
+    """
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS playlists (
+        guild_id TEXT NOT NULL,
+        name     TEXT NOT NULL,
+        owner    TEXT NOT NULL,
+        PRIMARY KEY (guild_id, name)
+    );
+    CREATE TABLE IF NOT EXISTS tracks (
+        id       INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id TEXT    NOT NULL,
+        name     TEXT    NOT NULL,
+        pos      INTEGER NOT NULL,
+        url      TEXT    NOT NULL,
+        title    TEXT,
+        duration INTEGER,
+        media_id TEXT,
+        FOREIGN KEY (guild_id, name) REFERENCES playlists (guild_id, name)
+            ON DELETE CASCADE
+    );
+    CREATE INDEX IF NOT EXISTS idx_tracks_playlist ON tracks (guild_id, name, pos);
+    CREATE INDEX IF NOT EXISTS idx_playlists_owner ON playlists (owner);
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+
+    def __init__(self, path: Path = _DB, import_from: Optional[Path] = _STORE) -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+        with self._conn() as c:
+            c.executescript(self._SCHEMA)
+            # قواعد أُنشئت قبل إضافة البيانات الوصفيّة
+            cols = {r[1] for r in c.execute("PRAGMA table_info(tracks)")}
+            for col, typ in (("title", "TEXT"), ("duration", "INTEGER"), ("media_id", "TEXT")):
+                if col not in cols:
+                    c.execute(f"ALTER TABLE tracks ADD COLUMN {col} {typ}")
+        if import_from is not None:
+            self._import_json(Path(import_from))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _import_json(self, src: Path) -> None:
+        """نقل البيانات القديمة فى معاملة واحدة، ثم إعادة تسمية الملف."""
+        c = self._conn()
+        if not src.exists() or c.execute(
+                "SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+            return
+        data: Dict[str, Dict[str, Record]] = json.loads(src.read_text(encoding="utf-8"))
+        with c:
+            for guild, pls in data.items():
+                for name, rec in pls.items():
+                    c.execute("INSERT OR IGNORE INTO playlists VALUES (?, ?, ?)",
+                              (guild, name, rec["owner"]))
+                    c.executemany(
+                        "INSERT INTO tracks (guild_id, name, pos, url, title, duration, media_id) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [(guild, name, i, t["url"], t.get("title"), t.get("duration"),
+                          t.get("media_id"))
+                         for i, t in enumerate(_upgrade(rec)["tracks"])])
+            c.execute("INSERT INTO meta VALUES ('json_imported', ?)", (str(src),))
+        os.replace(src, src.with_name(src.name + ".imported"))
+
+    # ---------- قراءة ---------- #
+    def get(self, guild: str, name: str) -> Optional[Record]:
+        c = self._conn()
+        row = c.execute("SELECT owner FROM playlists WHERE guild_id = ? AND name = ?",
+                        (guild, name)).fetchone()
+        if row is None:
+            return None
+        tracks = [_track(*r) for r in c.execute(
+            "SELECT url, title, duration, media_id FROM tracks "
+            "WHERE guild_id = ? AND name = ? ORDER BY pos", (guild, name))]
+        return {"owner": row[0], "tracks": tracks}
+
+    def guild_names(self, guild: str) -> List[str]:
+        return [n for (n,) in self._conn().execute(
+            "SELECT name FROM playlists WHERE guild_id = ?", (guild,))]
+
+    def owned_by(self, owner: str) -> List[Tuple[str, str]]:
+        return list(self._conn().execute(
+            "SELECT guild_id, name FROM playlists WHERE owner = ?", (owner,)))
+
+    def titled_tracks(self) -> List[Tuple[str, str]]:
+        return list(self._conn().execute(
+            "SELECT DISTINCT title, url FROM tracks WHERE title IS NOT NULL"))
+
+    # ---------- كتابة ---------- #
+    def create(self, guild: str, name: str, owner: str) -> None:
+        try:
+            with self._conn() as c:
+                c.execute("INSERT INTO playlists VALUES (?, ?, ?)", (guild, name, owner))
+        except sqlite3.IntegrityError:
+            # إنشاءان متزامنان من خيطين لنفس الاسم
+            raise ValueError("اسم هذه القائمة مستخدم بالفعل فى هذا السيرفر.") from None
+
+    def append(self, guild: str, name: str, track: Track) -> None:
+        with self._conn() as c:
+            c.execute(
+                "INSERT INTO tracks (guild_id, name, pos, url, title, duration, media_id) "
+                "VALUES (?, ?, (SELECT COALESCE(MAX(pos), -1) + 1 FROM tracks "
+                "WHERE guild_id = ? AND name = ?), ?, ?, ?, ?)",
+                (guild, name, guild, name, track["url"], track.get("title"),
+                 track.get("duration"), track.get("media_id")))
+
+    def extend(self, guild: str, name: str, tracks: List[Track]) -> None:
+        """كل المقاطع فى معاملة واحدة."""
+        with self._conn() as c:
+            (start,) = c.execute(
+                "SELECT COALESCE(MAX(pos), -1) + 1 FROM tracks "
+                "WHERE guild_id = ? AND name = ?", (guild, name)).fetchone()
+            c.executemany(
+                "INSERT INTO tracks (guild_id, name, pos, url, title, duration, media_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(guild, name, start + i, t["url"], t.get("title"), t.get("duration"),
+                  t.get("media_id")) for i, t in enumerate(tracks)])
+
+    def remove_at(self, guild: str, name: str, index: int) -> None:
+        with self._conn() as c:
+            c.execute(
+                "DELETE FROM tracks WHERE id = (SELECT id FROM tracks "
+                "WHERE guild_id = ? AND name = ? ORDER BY pos LIMIT 1 OFFSET ?)",
+                (guild, name, index))
+
+    def update_meta(self, guild: str, name: str, url: str, meta: Dict) -> None:
+        cols = [k for k in _META if k in meta]
+        if not cols:
+            return
+        with self._conn() as c:
+            c.execute(
+                f"UPDATE tracks SET {', '.join(f'{k} = ?' for k in cols)} "
+                "WHERE guild_id = ? AND name = ? AND url = ?",
+                (*(meta[k] for k in cols), guild, name, url))
+
+    def delete(self, guild: str, name: str) -> None:
+        with self._conn() as c:
+            c.execute("DELETE FROM playlists WHERE guild_id = ? AND name = ?", (guild, name))
+
+
+Backend = Union[JsonBackend, SqliteBackend]
+BACKENDS = {"json": JsonBackend, "sqlite": SqliteBackend}
+
+
+# ════════════════════════════════
+#            المتجر
+# ════════════════════════════════
 class PlaylistStore:
     """
     • قائمة التشغيل محفوظة داخل السيرفر (guild) الذى أُنشِئت فيه لكل الأعضاء.
     • المالك (owner_id) يرى قوائمه فى أى سيرفر آخر.
+    • التخزين قابل للاستبدال: SQLite (افتراضى) أو JSON.
+    • كل مقطع يحفظ العنوان والمدّة ومعرّف الوسائط ليُعرض ويُشغَّل فورًا.
+    • الدوالّ متزامنة وتُستدعى عبر asyncio.to_thread حتى لا تحجب الحلقة.
     """
-    def __init__(self) -> None:
-        # guild_id(str) -> { name(str): {"owner": user_id(str), "urls": [str,…]} }
-        self._data: Dict[str, Dict[str, Dict[str, object]]] = (
-            json.loads(_STORE.read_text(encoding="utf-8"))
-            if _STORE.exists() else {}
-        )
+    def __init__(self, backend: Union[str, Backend] = "sqlite") -> None:
+        if isinstance(backend, str):
+            if backend not in BACKENDS:
+                raise ValueError(f"نوع تخزين غير معروف: {backend}")
+            backend = BACKENDS[backend]()
+        self._db: Backend = backend
 
     # ---------- أدوات داخليّة ---------- #
-    def _flush(self) -> None:
-        _STORE.write_text(json.dumps(self._data, ensure_ascii=False, indent=2),
-                          encoding="utf-8")
-
-    def _get_record(self, guild_id: int, name: str) -> Optional[Dict]:
-        return self._data.get(str(guild_id), {}).get(name)
+    def _get_record(self, guild_id: int, name: str) -> Optional[Record]:
+        return self._db.get(str(guild_id), name)
 
     # ---------- عمليات أساسيّة ---------- #
     def create(self, guild_id: int, owner_id: int, name: str) -> None:
-        g = self._data.setdefault(str(guild_id), {})
-        if name in g:
+        if self._get_record(guild_id, name) is not None:
             raise ValueError("اسم هذه القائمة مستخدم بالفعل فى هذا السيرفر.")
-        g[name] = {"owner": str(owner_id), "urls": []}
-        self._flush()
+        self._db.create(str(guild_id), name, str(owner_id))
 
-    def add_track(self, guild_id: int, owner_id: int, name: str, url: str) -> None:
+    def ensure_editable(self, guild_id: int, owner_id: int, name: str) -> None:
+        """KeyError / PermissionError إن لم يكن للمستخدم حقّ الإضافة إلى القائمة."""
         rec = self._get_record(guild_id, name)
         if rec is None:
             raise KeyError("القائمة غير موجودة.")
         if rec["owner"] != str(owner_id) and guild_id != 0:
             raise PermissionError("فقط مالك القائمة يستطيع تعديلها.")
-        rec["urls"].append(url)
-        self._flush()
+
+    def add_track(self, guild_id: int, owner_id: int, name: str, url: str, *,
+                  title: Optional[str] = None, duration: Optional[int] = None,
+                  media_id: Optional[str] = None) -> None:
+        self.ensure_editable(guild_id, owner_id, name)
+        self._db.append(str(guild_id), name, _track(url, title, duration, media_id))
+
+    def add_tracks(self, guild_id: int, owner_id: int, name: str,
+                   tracks: List[Track]) -> int:
+        """إضافة دفعة مقاطع بكتابة واحدة (استيراد قوائم كاملة)."""
+        self.ensure_editable(guild_id, owner_id, name)
+        rows = [_track(t["url"], *(t.get(k) for k in _META)) for t in tracks]
+        if rows:
+            self._db.extend(str(guild_id), name, rows)
+        return len(rows)
 
     def remove_track(self, guild_id: int, owner_id: int, name: str, index: int) -> None:
         rec = self._get_record(guild_id, name)
@@ -49,38 +373,52 @@ class PlaylistStore:
             raise KeyError("القائمة غير موجودة.")
         if rec["owner"] != str(owner_id):
             raise PermissionError("فقط مالك القائمة يستطيع تعديلها.")
-        if not 1 <= index <= len(rec["urls"]):
+        if not 1 <= index <= len(rec["tracks"]):
             raise IndexError("رقم مقطع غير صحيح.")
-        rec["urls"].pop(index - 1)
-        self._flush()
+        self._db.remove_at(str(guild_id), name, index - 1)
 
     def delete(self, guild_id: int, owner_id: int, name: str) -> None:
-        g = self._data.get(str(guild_id))
-        if not g or name not in g:
+        rec = self._get_record(guild_id, name)
+        if rec is None:
             raise KeyError("القائمة غير موجودة.")
-        if g[name]["owner"] != str(owner_id):
+        if rec["owner"] != str(owner_id):
             raise PermissionError("فقط مالك القائمة يستطيع الحذف.")
-        del g[name]
-        self._flush()
+        self._db.delete(str(guild_id), name)
 
     # ---------- استرجاع ---------- #
     def list_names(self, guild_id: int, user_id: int) -> List[str]:
         names = set()
         # قوائم السيرفر
-        names.update(self._data.get(str(guild_id), {}).keys())
+        names.update(self._db.guild_names(str(guild_id)))
         # قوائم يملكها المستخدم فى أى سيرفر
-        for g in self._data.values():
-            for n, rec in g.items():
-                if rec["owner"] == str(user_id):
-                    names.add(n)
+        names.update(n for _, n in self._db.owned_by(str(user_id)))
         return sorted(names)
 
-    def get_urls(self, guild_id: int, user_id: int, name: str) -> Optional[List[str]]:
+    def _locate(self, guild_id: int, user_id: int, name: str) -> Optional[str]:
         # أولوية: القائمة فى هذا السيرفر – ثم قوائم يملكها المستخدم
-        rec = self._get_record(guild_id, name)
-        if rec:
-            return list(rec["urls"])
-        for g in self._data.values():
-            if name in g and g[name]["owner"] == str(user_id):
-                return list(g[name]["urls"])
+        if self._get_record(guild_id, name) is not None:
+            return str(guild_id)
+        # فهرس المالك → تكلفة بعدد قوائم المستخدم لا بعدد كل القوائم
+        for g, n in sorted(self._db.owned_by(str(user_id))):
+            if n == name:
+                return g
         return None
+
+    def titled_tracks(self) -> List[Tuple[str, str]]:
+        """(عنوان، رابط) لكل مقطع محفوظ معروف العنوان — لفهرس الإكمال التلقائى."""
+        return self._db.titled_tracks()
+
+    def get_tracks(self, guild_id: int, user_id: int, name: str) -> Optional[List[Track]]:
+        g = self._locate(guild_id, user_id, name)
+        return None if g is None else self._db.get(g, name)["tracks"]
+
+    def get_urls(self, guild_id: int, user_id: int, name: str) -> Optional[List[str]]:
+        tracks = self.get_tracks(guild_id, user_id, name)
+        return None if tracks is None else [t["url"] for t in tracks]
+
+    def update_meta(self, guild_id: int, user_id: int, name: str, url: str,
+                    **meta) -> None:
+        """تحديث بيانات مقطع محفوظ (تُستدعى فى الخلفيّة بعد حلّها)."""
+        g = self._locate(guild_id, user_id, name)
+        if g is not None:
+            self._db.update_meta(g, name, url, {k: v for k, v in meta.items() if k in _META})
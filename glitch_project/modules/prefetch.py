@@ -0,0 +1,114 @@
+# modules/prefetch.py
+import asyncio
+from typing import Dict, List, Optional
+
+from modules.downloader import Downloader, merge_media, normalize_url
+from modules.logger_config import setup_logger
+from modules.scheduler import Priority
+
+Item = Dict[str, object]
+
+
+class PrefetchManager:
+    """
+    تنزيل مسبق لكل سيرفر بنافذة متكيّفة بدل "المقطعين التاليين" دائمًا:
+    • النافذة تغطّى horizon ثانية من الاستماع القادم (باقى الحالى + التالية)،
+      فالسور القصيرة تُجلب بالعشرات والطويلة واحدة فقط
+    • مقيّدة بحصّة من ميزانيّة القرص (تقدير بحجم Opus) وبحدّ أقصى للعناصر
+    • التنزيلات الجارية لا تُلغى عند تغيّر المقطع؛ تستمرّ وتُكتب نتيجتها
+      فى عناصر الطابور الحالى المطابقة (path/codec/…)
+    """
+    DISK_SHARE = 0.1        # أقصى نسبة من حصّة الكاش لسيرفر واحد
+    UNKNOWN_DURATION = 600  # تقدير مدّة عنصر بلا بيانات (ثوانٍ)
+
+    def __init__(self, downloader: Downloader, *, horizon: float = 900,
+                 max_items: int = 8, logger=None) -> None:
+        self.logger = logger or setup_logger(__name__)
+        self.dl = downloader
+        self.horizon = horizon
+        self.max_items = max(1, max_items)
+        self._queues: Dict[int, List[Item]] = {}                # gid → طابور السيرفر الحالى
+        self._tasks: Dict[int, Dict[str, asyncio.Task]] = {}    # gid → key → تنزيل جارٍ
+        self.stats = {"started": 0, "reused": 0, "written_back": 0, "failed": 0,
+                      "last_window": 0}
+
+    # ---------- واجهة ---------- #
+    def update(self, gid: int, playlist: List[Item], index: int,
+               remaining: float = 0.0) -> List[asyncio.Task]:
+        """
+        حساب النافذة بعد المقطع index وبدء ما ينقصها.
+        remaining = ما بقى من المقطع الحالى (ثوانٍ). يعيد مهامّ النافذة بالترتيب.
+        """
+        self._queues[gid] = playlist
+        if not playlist:
+            return []
+        window = self._window(playlist, index, remaining)
+        self.stats["last_window"] = len(window)
+        return [self._ensure(gid, itm["url"],
+                             Priority.NEXT if n == 0 else Priority.LOOKAHEAD)
+                for n, itm in enumerate(window)]
+
+    def pending(self, gid: int, url: str) -> Optional[asyncio.Task]:
+        return self._tasks.get(gid, {}).get(normalize_url(url))
+
+    def forget(self, gid: int) -> None:
+        """فكّ ارتباط الطابور (stop)؛ التنزيلات الجارية تكمل لتملأ الكاش فقط."""
+        self._queues.pop(gid, None)
+
+    def stats_snapshot(self) -> Dict[str, int]:
+        return {**self.stats, "inflight": sum(len(t) for t in self._tasks.values())}
+
+    # ---------- داخلى ---------- #
+    def _window(self, playlist: List[Item], index: int, remaining: float) -> List[Item]:
+        cap = self.dl.cache.max_bytes * self.DISK_SHARE if self.dl.cache.max_bytes else 0
+        bytes_per_sec = self.dl.OPUS_KBPS * 1000 / 8
+        covered, est, window, seen = remaining, 0.0, [], set()
+        for off in range(1, min(len(playlist), self.max_items + 1)):
+            itm = playlist[(index + off) % len(playlist)]
+            dur = float(itm.get("duration") or self.UNKNOWN_DURATION)
+            if "path" not in itm and "url" in itm and itm["url"] not in seen:
+                est += dur * bytes_per_sec
+                if window and cap and est > cap:
+                    break
+                window.append(itm)
+                seen.add(itm["url"])
+            covered += dur
+            if covered >= self.horizon:
+                break
+        return window
+
+    def _ensure(self, gid: int, url: str, priority: Priority) -> asyncio.Task:
+        key = normalize_url(url)
+        tasks = self._tasks.setdefault(gid, {})
+        task = tasks.get(key)
+        if task is not None:
+            self.stats["reused"] += 1
+            self.dl.scheduler.promote(key, priority)
+            return task
+        self.stats["started"] += 1
+        task = asyncio.get_running_loop().create_task(
+            self.dl.download(url, priority=priority, group=gid))
+        tasks[key] = task
+        task.add_done_callback(lambda t: self._done(gid, key, t))
+        return task
+
+    def _done(self, gid: int, key: str, task: asyncio.Task) -> None:
+        tasks = self._tasks.get(gid, {})
+        tasks.pop(key, None)
+        if not tasks:
+            self._tasks.pop(gid, None)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            self.stats["failed"] += 1
+            self.logger.debug(f"[prefetch] فشل تنزيل {key}: {exc}")
+            return
+        media = task.result()
+        if not isinstance(media, dict):
+            return
+        # كتابة النتيجة فى عناصر الطابور الحالى (قد يكون تغيّر منذ البدء)
+        for itm in self._queues.get(gid, ()):
+            if "path" not in itm and normalize_url(itm.get("url", "")) == key:
+                merge_media(itm, media)
+                self.stats["written_back"] += 1
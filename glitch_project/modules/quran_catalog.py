@@ -0,0 +1,194 @@
+# modules/quran_catalog.py
+import difflib
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from modules.logger_config import setup_logger
+
+Entry = Dict[str, object]
+
+# أسماء السور بترتيب المصحف (1…114)
+SURAHS = (
+    "الفاتحة", "البقرة", "آل عمران", "النساء", "المائدة", "الأنعام", "الأعراف",
+    "الأنفال", "التوبة", "يونس", "هود", "يوسف", "الرعد", "إبراهيم", "الحجر",
+    "النحل", "الإسراء", "الكهف", "مريم", "طه", "الأنبياء", "الحج", "المؤمنون",
+    "النور", "الفرقان", "الشعراء", "النمل", "القصص", "العنكبوت", "الروم",
+    "لقمان", "السجدة", "الأحزاب", "سبأ", "فاطر", "يس", "الصافات", "ص", "الزمر",
+    "غافر", "فصلت", "الشورى", "الزخرف", "الدخان", "الجاثية", "الأحقاف", "محمد",
+    "الفتح", "الحجرات", "ق", "الذاريات", "الطور", "النجم", "القمر", "الرحمن",
+    "الواقعة", "الحديد", "المجادلة", "الحشر", "الممتحنة", "الصف", "الجمعة",
+    "المنافقون", "التغابن", "الطلاق", "التحريم", "الملك", "القلم", "الحاقة",
+    "المعارج", "نوح", "الجن", "المزمل", "المدثر", "القيامة", "الإنسان",
+    "المرسلات", "النبأ", "النازعات", "عبس", "التكوير", "الانفطار", "المطففين",
+    "الانشقاق", "البروج", "الطارق", "الأعلى", "الغاشية", "الفجر", "البلد",
+    "الشمس", "الليل", "الضحى", "الشرح", "التين", "العلق", "القدر", "البينة",
+    "الزلزلة", "العاديات", "القارعة", "التكاثر", "العصر", "الهمزة", "الفيل",
+    "قريش", "الماعون", "الكوثر", "الكافرون", "النصر", "المسد", "الإخلاص",
+    "الفلق", "الناس",
+)
+assert len(SURAHS) == 114
+
+# أسماء شائعة أخرى لبعض السور
+SURAH_ALIASES = {
+    "الحمد": 1, "ام الكتاب": 1, "براءة": 9, "بني اسرائيل": 17, "الاسراء": 17,
+    "المؤمن": 40, "حم السجدة": 41, "الدهر": 76, "عم": 78, "الانشراح": 94,
+    "اقرا": 96, "لم يكن": 98, "الزلزال": 99, "تبت": 111, "اللهب": 111,
+    "قل هو الله احد": 112, "التوحيد": 112,
+}
+
+# id → (الاسم، خادم mp3quran، أسماء بديلة)
+RECITERS: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "basit":  ("عبد الباسط عبد الصمد", "https://server7.mp3quran.net/basit/",
+               ("عبدالباسط", "عبد الباسط", "abdulbasit", "abdul basit")),
+    "afs":    ("مشاري راشد العفاسي", "https://server8.mp3quran.net/afs/",
+               ("العفاسي", "مشاري", "afasy", "alafasy", "mishary")),
+    "maher":  ("ماهر المعيقلي", "https://server12.mp3quran.net/maher/",
+               ("المعيقلي", "ماهر", "maher", "muaiqly")),
+    "s_gmd":  ("سعد الغامدي", "https://server7.mp3quran.net/s_gmd/",
+               ("الغامدي", "ghamdi")),
+    "sds":    ("عبد الرحمن السديس", "https://server11.mp3quran.net/sds/",
+               ("السديس", "sudais")),
+    "shur":   ("سعود الشريم", "https://server7.mp3quran.net/shur/",
+               ("الشريم", "shuraim")),
+    "minsh":  ("محمد صديق المنشاوي", "https://server10.mp3quran.net/minsh/",
+               ("المنشاوي", "minshawi")),
+    "husr":   ("محمود خليل الحصري", "https://server13.mp3quran.net/husr/",
+               ("الحصري", "husary", "hussary")),
+    "ajm":    ("أحمد بن علي العجمي", "https://server10.mp3quran.net/ajm/",
+               ("العجمي", "ajmi")),
+    "yasser": ("ياسر الدوسري", "https://server11.mp3quran.net/yasser/",
+               ("الدوسري", "dosari", "dossari")),
+    "qtm":    ("ناصر القطامي", "https://server6.mp3quran.net/qtm/",
+               ("القطامي", "qatami")),
+    "frs_a":  ("فارس عباد", "https://server8.mp3quran.net/frs_a/",
+               ("عباد", "fares abbad")),
+    "abkr":   ("إدريس أبكر", "https://server6.mp3quran.net/abkr/",
+               ("ابكر", "abkar")),
+    "shatri": ("أبو بكر الشاطري", "https://server11.mp3quran.net/shatri/",
+               ("الشاطري", "shatri")),
+    "hani":   ("هاني الرفاعي", "https://server8.mp3quran.net/hani/",
+               ("الرفاعي", "rifai")),
+    "jleel":  ("خالد الجليل", "https://server10.mp3quran.net/jleel/",
+               ("الجليل", "jaleel")),
+    "bsfr":   ("عبد الله بصفر", "https://server6.mp3quran.net/bsfr/",
+               ("بصفر", "basfar")),
+}
+
+_RX_TASHKEEL = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_TRANS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ى": "ي", "ة": "ه",
+                        "ؤ": "و", "ئ": "ي", "٠": "0", "١": "1", "٢": "2", "٣": "3",
+                        "٤": "4", "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9"})
+_SURAH_WORDS = {"سوره", "surah", "sura"}
+_FILLER = _SURAH_WORDS | {"القارئ", "الشيخ", "تلاوه", "بصوت", "-"}
+
+
+def normalize_ar(text: str) -> str:
+    """توحيد الكتابة العربيّة: بلا تشكيل/تطويل، همزات → ا، ة → ه، ى → ي."""
+    text = _RX_TASHKEEL.sub("", (text or "").casefold()).translate(_TRANS)
+    return " ".join(text.replace("عبد ال", "عبدال").split())
+
+
+def _bare(name: str) -> str:
+    """الاسم دون "ال" التعريف (البقره → بقره)."""
+    return name[2:] if name.startswith("ال") and len(name) > 3 else name
+
+
+class QuranCatalog:
+    """
+    فهرس محلّى: قرّاء × 114 سورة → روابط صوت مباشرة (mp3quran)،
+    يحلّ استعلامات "القارئ + السورة" داخل العمليّة دون بحث yt-dlp:
+    • أسماء موحّدة الكتابة مع بدائل شائعة ("عبدالباسط"، "براءة"، أرقام السور)
+    • تطابق تامّ، ثم بادئة، ثم تقريبى (difflib) للسورة
+    • قارئ افتراضى إن ذُكرت كلمة "سورة" دون قارئ ("سورة الكهف")؛ غير ذلك
+      (كلمة واحدة مثل "محمد" أو "نوح" أو رقم) يذهب للبحث العادى
+    • ملف JSON اختيارى يضيف/يستبدل قرّاء: {"id": {"name", "server", "aliases"}}
+    """
+    FUZZY_CUTOFF = 0.8
+
+    def __init__(self, extra: Optional[str] = None, *, default_reciter: str = "afs",
+                 logger=None) -> None:
+        self.logger = logger or setup_logger(__name__)
+        self.reciters = {rid: {"name": n, "server": s, "aliases": a}
+                         for rid, (n, s, a) in RECITERS.items()}
+        if extra:
+            self._load(Path(extra))
+        if default_reciter not in self.reciters:
+            raise ValueError(f"قارئ افتراضى غير معروف: {default_reciter}")
+        self.default_reciter = default_reciter
+
+        # اسم/بديل موحّد → رقم السورة (مع وبدون "ال")
+        self._surahs: Dict[str, int] = {}
+        for n, name in enumerate(SURAHS, 1):
+            key = normalize_ar(name)
+            self._surahs[key] = self._surahs[_bare(key)] = n
+        for alias, n in SURAH_ALIASES.items():
+            self._surahs.setdefault(normalize_ar(alias), n)
+        # بديل موحّد → القارئ؛ الأطول أولًا حتى يُلتقط الاسم الكامل قبل جزئه
+        aliases = {}
+        for rid, r in self.reciters.items():
+            for a in (r["name"], *r["aliases"]):
+                aliases[normalize_ar(a)] = rid
+        self._reciter_aliases: List[Tuple[str, str]] = sorted(
+            aliases.items(), key=lambda kv: -len(kv[0]))
+        self._surah_keys = sorted(self._surahs)
+
+    def _load(self, path: Path) -> None:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            self.logger.warning(f"[catalog] تعذّر قراءة {path}: {exc}")
+            return
+        for rid, r in data.items():
+            self.reciters[rid] = {"name": r["name"], "server": r["server"].rstrip("/") + "/",
+                                  "aliases": tuple(r.get("aliases", ()))}
+
+    # ---------- واجهة ---------- #
+    def url(self, reciter: str, surah: int) -> str:
+        return f"{self.reciters[reciter]['server']}{surah:03}.mp3"
+
+    def entry(self, reciter: str, surah: int) -> Entry:
+        return {"url": self.url(reciter, surah),
+                "title": f"سورة {SURAHS[surah - 1]} — {self.reciters[reciter]['name']}",
+                "duration": 0}
+
+    def suggestions(self) -> Iterator[Tuple[str, str]]:
+        """(عنوان، استعلام يحلّه resolve) لكل قارئ × سورة — لفهرس الإكمال التلقائى."""
+        for rid, r in self.reciters.items():
+            for n, name in enumerate(SURAHS, 1):
+                yield self.entry(rid, n)["title"], f"{r['name']} سورة {name}"
+
+    def resolve(self, query: str) -> Optional[Entry]:
+        """استعلام "قارئ + سورة" → عنصر طابور، أو None ليُستخدم البحث العادى."""
+        text = f" {normalize_ar(query)} "
+        reciter = None
+        for alias, rid in self._reciter_aliases:
+            if f" {alias} " in text:
+                reciter = rid
+                text = text.replace(f" {alias} ", " ", 1)
+                break
+        # بلا قارئ معروف ولا كلمة "سورة" → استعلام عادى لا سورة
+        if reciter is None and not _SURAH_WORDS.intersection(text.split()):
+            return None
+        words = [w for w in text.split() if w not in _FILLER]
+        surah = self._surah(" ".join(words))
+        if surah is None:
+            return None
+        return self.entry(reciter or self.default_reciter, surah)
+
+    def _surah(self, text: str) -> Optional[int]:
+        if not text:
+            return None
+        if text.isdigit():
+            n = int(text)
+            return n if 1 <= n <= 114 else None
+        n = self._surahs.get(text) or self._surahs.get(_bare(text))
+        if n:
+            return n
+        # بادئة فريدة ("العنكب" → العنكبوت)
+        hits = {self._surahs[k] for k in self._surah_keys if len(text) >= 3 and k.startswith(text)}
+        if len(hits) == 1:
+            return hits.pop()
+        close = difflib.get_close_matches(text, self._surah_keys, n=1, cutoff=self.FUZZY_CUTOFF)
+        return self._surahs[close[0]] if close else None
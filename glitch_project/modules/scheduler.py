@@ -0,0 +1,192 @@
+# modules/scheduler.py
+import asyncio
+import time
+from collections import OrderedDict, deque
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+from modules.logger_config import setup_logger
+
+
+class Priority(IntEnum):
+    """الأصغر أعلى أولويّة."""
+    NOW       = 0    # المقطع المطلوب تشغيله الآن
+    NEXT      = 1    # المقطع التالى مباشرة
+    LOOKAHEAD = 2    # ما بعده فى نافذة التحميل المسبق
+    WARMUP    = 3    # تسخين القوائم / ملء الكاش / إعادة التحقّق
+
+
+class _Job:
+    __slots__ = ("fn", "priority", "group", "key", "future", "queued_at")
+
+    def __init__(self, fn, priority, group, key, future):
+        self.fn = fn
+        self.priority = priority
+        self.group = group
+        self.key = key
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class DownloadScheduler:
+    """
+    مجدول تنزيلات عامّ لكل السيرفرات:
+    • عدد عمّال محدود قابل للضبط
+    • أولويّات: الآن > التالى > نافذة التحميل المسبق > التسخين
+    • داخل نفس الأولويّة: تناوب عادل بين السيرفرات (round-robin)
+    • عمّال محجوزون (RESERVED) للآن/التالى فقط: العامل لا يُقاطَع أثناء مهمّة،
+      فبحث أو حلّ رابط عاجل لا ينتظر انتهاء تنزيلات التسخين الطويلة
+    • مقاييس: عمق الطابور وزمن الانتظار لكل أولويّة
+    """
+    RESERVED = 1                    # عمّال إضافيّون لا يأخذون إلا NOW / NEXT
+    URGENT = Priority.NEXT
+
+    def __init__(self, workers: int = 3, logger=None) -> None:
+        self.logger = logger or setup_logger(__name__)
+        self.workers = max(1, workers)
+        # لكل أولويّة: group → طابور مهامّه (الترتيب = دور السيرفر)
+        self._queues: List["OrderedDict[Hashable, Deque[_Job]]"] = [
+            OrderedDict() for _ in Priority
+        ]
+        self._by_key: Dict[Hashable, _Job] = {}
+        # عمّال ينتظرون مهمّة: (أدنى أولويّة يقبلها العامل، Future يوقظه)
+        self._idle: List[Tuple[Priority, "asyncio.Future[None]"]] = []
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+        self.running = 0
+        self.stats = {p.name.lower(): {"submitted": 0, "done": 0,
+                                       "wait_ms_avg": 0.0, "wait_ms_max": 0.0}
+                      for p in Priority}
+
+    # ---------- واجهة عامّة ---------- #
+    def submit(self, fn: Callable[[], Awaitable[Any]], *,
+               priority: Priority = Priority.LOOKAHEAD, group: Hashable = 0,
+               key: Optional[Hashable] = None) -> "asyncio.Future[Any]":
+        """
+        جدولة مهمّة غير متزامنة؛ تُرجِع Future بنتيجتها.
+        مفتاح مكرّر لمهمّة ما زالت فى الطابور → نفس الـ Future مع رفع أولويّتها.
+        """
+        self._start()
+        if key is not None and key in self._by_key:
+            job = self._by_key[key]
+            self.promote(key, priority)
+            return job.future
+
+        job = _Job(fn, Priority(priority), group, key,
+                   asyncio.get_running_loop().create_future())
+        self._push(job)
+        if key is not None:
+            self._by_key[key] = job
+        self.stats[job.priority.name.lower()]["submitted"] += 1
+        self._wake(job.priority)
+        return job.future
+
+    def promote(self, key: Hashable, priority: Priority) -> None:
+        """رفع أولويّة مهمّة منتظرة (مثلاً: عنصر التحميل المسبق صار مطلوبًا الآن)."""
+        job = self._by_key.get(key)
+        if job is None or priority >= job.priority:
+            return
+        q = self._queues[job.priority]
+        dq = q.get(job.group)
+        if dq is None or job not in dq:
+            return
+        dq.remove(job)
+        if not dq:
+            del q[job.group]
+        job.priority = Priority(priority)
+        self._push(job)
+        self._wake(job.priority)
+
+    def stats_snapshot(self) -> Dict[str, Any]:
+        depth = {p.name.lower(): sum(len(d) for d in self._queues[p].values())
+                 for p in Priority}
+        return {"workers": self.workers, "reserved": self.RESERVED,
+                "running": self.running,
+                "queued": depth, "classes": self.stats}
+
+    async def close(self) -> None:
+        self._closing = True
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._idle.clear()
+
+    # ---------- داخلى ---------- #
+    def _start(self) -> None:
+        if self._tasks:
+            return
+        self._closing = False
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker(Priority.WARMUP))
+                       for _ in range(self.workers)]
+        self._tasks += [loop.create_task(self._worker(self.URGENT))
+                        for _ in range(self.RESERVED)]
+
+    def _push(self, job: _Job) -> None:
+        q = self._queues[job.priority]
+        q.setdefault(job.group, deque()).append(job)
+
+    def _wake(self, priority: Priority) -> None:
+        """إيقاظ عامل خامل يقبل هذه الأولويّة؛ العامّ أوّلًا ليبقى المحجوز متاحًا."""
+        for w in sorted(self._idle, key=lambda w: -w[0]):
+            if priority <= w[0]:
+                self._idle.remove(w)
+                if not w[1].done():
+                    w[1].set_result(None)
+                return
+
+    def _pop(self, limit: Priority = Priority.WARMUP) -> Optional[_Job]:
+        for q in self._queues[:limit + 1]:
+            if not q:
+                continue
+            group, dq = next(iter(q.items()))
+            job = dq.popleft()
+            if dq:
+                q.move_to_end(group)    # دور السيرفر التالى
+            else:
+                del q[group]
+            return job
+        return None
+
+    async def _worker(self, limit: Priority) -> None:
+        """limit: أدنى أولويّة يأخذها العامل (WARMUP = الكل، NEXT = المحجوز)."""
+        while True:
+            job = self._pop(limit)
+            if job is None:
+                wake = asyncio.get_running_loop().create_future()
+                self._idle.append((limit, wake))
+                await wake
+                continue
+            if job.key is not None:
+                self._by_key.pop(job.key, None)
+            if job.future.done():       # أُلغيت قبل أن يأتى دورها
+                continue
+
+            self._record_wait(job)
+            self.running += 1
+            try:
+                result = await job.fn()
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                # إلغاء العامل نفسه (close) → خروج؛ أمّا إلغاء صادر من المهمّة
+                # (مثل shutdown(cancel_futures) للمجمّع) فلا يُنقص عدد العمّال
+                task = asyncio.current_task()
+                if self._closing or getattr(task, "cancelling", lambda: 0)():
+                    raise
+            except Exception as exc:
+                if not job.future.done():
+                    job.future.set_exception(exc)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self.running -= 1
+                self.stats[job.priority.name.lower()]["done"] += 1
+
+    def _record_wait(self, job: _Job) -> None:
+        wait = (time.monotonic() - job.queued_at) * 1000
+        s = self.stats[job.priority.name.lower()]
+        s["wait_ms_avg"] = round(s["wait_ms_avg"] * 0.9 + wait * 0.1, 1)
+        s["wait_ms_max"] = round(max(s["wait_ms_max"], wait), 1)
@@ -0,0 +1,102 @@
+# modules/search_cache.py
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from modules.logger_config import setup_logger
+
+Result = Dict[str, object]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").casefold().split())
+
+
+class SearchCache:
+    """
+    كاش نتائج البحث مشترك بين كل السيرفرات:
+    • LRU بحدّ أقصى للمدخلات + صلاحيّة (TTL) لكل مدخل
+    • يُحفظ على القرص (بتأخير بسيط لدمج الكتابات) ليبقى بعد إعادة التشغيل
+    """
+    SAVE_DELAY = 5          # ثوانٍ
+
+    def __init__(self, file: str = "search_cache.json", *, ttl: int = 6 * 3600,
+                 max_entries: int = 1000, logger=None) -> None:
+        self.logger = logger or setup_logger(__name__)
+        self.file = Path(file)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # query → {"expires": ts, "results": [...]}
+        self._data: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self.stats = {"hits": 0, "misses": 0}
+        self._load()
+
+    # ---------- تحميل / حفظ ---------- #
+    def _load(self) -> None:
+        if not self.file.exists():
+            return
+        try:
+            raw = json.loads(self.file.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            self.logger.warning(f"[search] تعذّر قراءة الكاش: {exc}")
+            return
+        now = time.time()
+        for q, rec in raw.items():
+            if rec.get("expires", 0) > now:
+                self._data[q] = rec
+
+    def _write(self, data: str) -> None:
+        with self._lock:
+            tmp = self.file.with_suffix(".tmp")
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, self.file)
+
+    def _schedule_save(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(self.SAVE_DELAY, self._save_now)
+
+    def _save_now(self) -> None:
+        self._save_handle = None
+        data = json.dumps(self._data, ensure_ascii=False)
+        asyncio.get_running_loop().run_in_executor(None, self._write, data)
+
+    # ---------- عمليات ---------- #
+    def get(self, query: str) -> Optional[List[Result]]:
+        key = normalize_query(query)
+        rec = self._data.get(key)
+        if rec is None or rec["expires"] <= time.time():
+            if rec is not None:
+                del self._data[key]
+            self.stats["misses"] += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats["hits"] += 1
+        return [dict(r) for r in rec["results"]]
+
+    def put(self, query: str, results: List[Result]) -> None:
+        key = normalize_query(query)
+        self._data[key] = {"expires": time.time() + self.ttl, "results": results}
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+        self._schedule_save()
+
+    def results(self) -> List[Result]:
+        """كل النتائج الصالحة المخزّنة (لبناء فهرس الإكمال التلقائى)."""
+        now = time.time()
+        return [r for rec in self._data.values() if rec["expires"] > now
+                for r in rec["results"]]
+
+    def stats_snapshot(self) -> Dict[str, int]:
+        return {**self.stats, "entries": len(self._data)}
@@ -0,0 +1,107 @@
+# modules/session_store.py
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_DB = Path("sessions.db")
+
+Session = Dict[str, object]     # صفّ sessions + "tracks": [{"url", "title", "duration"}]
+Row     = Tuple[str, Optional[str], Optional[int]]      # (url, title, duration)
+
+
+class SessionStore:
+    """
+    لقطات جلسات التشغيل (طابور كل سيرفر + المقطع الحالى + الموضع) فى SQLite
+    لاستئنافها بعد إعادة التشغيل أو الانهيار:
+    • WAL + synchronous=NORMAL: كتابة اللقطة لا تنتظر fsync ولا تحجب القرّاء
+    • تزايديّة: صفّ الموضع يُحدَّث وحده، ومقاطع الطابور تُكتب من أوّل موضع
+      تغيّر فقط (الإضافة لآخر الطابور = إدراج الجديد فقط)
+    • كل اللقطات فى معاملة واحدة → حالة متّسقة دائمًا على القرص
+    """
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        guild_id      INTEGER PRIMARY KEY,
+        voice_channel INTEGER NOT NULL,
+        text_channel  INTEGER,
+        pos           INTEGER NOT NULL,
+        position      REAL    NOT NULL DEFAULT 0,
+        paused        INTEGER NOT NULL DEFAULT 0,
+        updated       REAL    NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS session_tracks (
+        guild_id INTEGER NOT NULL,
+        seq      INTEGER NOT NULL,
+        url      TEXT    NOT NULL,
+        title    TEXT,
+        duration INTEGER,
+        PRIMARY KEY (guild_id, seq)
+    ) WITHOUT ROWID;
+    """
+    MAX_AGE = 6 * 3600          # جلسات أقدم من هذا لا تُستأنف
+
+    def __init__(self, path: Path = _DB) -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        with self._conn() as c:
+            c.executescript(self._SCHEMA)
+        self.stats = {"writes": 0, "rows": 0, "tracks": 0, "last_ms": 0.0}
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------- كتابة (من خيط) ---------- #
+    def write(self, sessions: List[tuple], tracks: Dict[int, Tuple[int, List[Row]]],
+              drop: Iterable[int] = ()) -> None:
+        """
+        sessions: صفوف (guild, voice, text, pos, position, paused) المتغيّرة.
+        tracks:   guild → (أوّل موضع تغيّر، المقاطع منه حتى النهاية).
+        drop:     سيرفرات انتهت جلساتها.
+        """
+        t0 = time.perf_counter()
+        now = time.time()
+        c = self._conn()
+        with self._lock, c:
+            for gid, (start, rows) in tracks.items():
+                c.execute("DELETE FROM session_tracks WHERE guild_id = ? AND seq >= ?",
+                          (gid, start))
+                c.executemany("INSERT INTO session_tracks VALUES (?, ?, ?, ?, ?)",
+                              [(gid, start + i, *r) for i, r in enumerate(rows)])
+            c.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                          [(*s, now) for s in sessions])
+            for gid in drop:
+                c.execute("DELETE FROM sessions WHERE guild_id = ?", (gid,))
+                c.execute("DELETE FROM session_tracks WHERE guild_id = ?", (gid,))
+        self.stats["writes"] += 1
+        self.stats["rows"] += len(sessions)
+        self.stats["tracks"] += sum(len(r) for _, r in tracks.values())
+        self.stats["last_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+
+    # ---------- قراءة ---------- #
+    def load(self) -> List[Session]:
+        """الجلسات الحديثة بمقاطعها؛ القديمة تُحذف."""
+        c = self._conn()
+        cutoff = time.time() - self.MAX_AGE
+        with self._lock, c:
+            c.execute("DELETE FROM session_tracks WHERE guild_id IN "
+                      "(SELECT guild_id FROM sessions WHERE updated < ?)", (cutoff,))
+            c.execute("DELETE FROM sessions WHERE updated < ?", (cutoff,))
+        cols = ("guild_id", "voice_channel", "text_channel", "pos", "position", "paused")
+        sessions = [dict(zip(cols, row)) for row in c.execute(
+            f"SELECT {', '.join(cols)} FROM sessions")]
+        for s in sessions:
+            s["tracks"] = [{"url": u, "title": t, "duration": d} for u, t, d in c.execute(
+                "SELECT url, title, duration FROM session_tracks "
+                "WHERE guild_id = ? ORDER BY seq", (s["guild_id"],))]
+        return sessions
+
+    def stats_snapshot(self) -> Dict[str, object]:
+        return dict(self.stats)
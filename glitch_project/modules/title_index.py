@@ -0,0 +1,88 @@
+# modules/title_index.py
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from modules.quran_catalog import normalize_ar
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """
+    فهرس عناوين فى الذاكرة لاقتراحات الإكمال التلقائى (بلا أى طلب شبكة):
+    • بادئات الكلمات → استعلام قصير ("الف" → الفاتحة، الفلق، …)
+    • trigrams → تطابق جزئى/خطأ إملائى فى أى موضع من العنوان
+    • كل عنوان له قيمة تُرسَل للأمر (رابط أو استعلام فهرس القرآن) ووزن
+      (المحفوظ والمُشغَّل أعلى من نتيجة بحث عابرة)
+    """
+    MAX_DOCS = 50_000
+    PREFIX_LEN = 6              # أطول بادئة مفهرسة لكل كلمة
+    VALUE_MAX = 100             # حدّ Discord لقيمة الاختيار
+
+    def __init__(self) -> None:
+        self._docs: List[Tuple[str, str, float]] = []       # (عنوان، قيمة، وزن)
+        self._by_value: Dict[str, int] = {}
+        self._prefix: Dict[str, Set[int]] = defaultdict(set)
+        self._grams: Dict[str, Set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, title: str, value: str, weight: float = 1.0) -> None:
+        if not title or title == "—" or not value or len(value) > self.VALUE_MAX:
+            return
+        doc = self._by_value.get(value)
+        if doc is not None:
+            # نفس القيمة من مصدر آخر → أعلى وزن فقط (العنوان الأوّل يبقى)
+            t, v, w = self._docs[doc]
+            self._docs[doc] = (t, v, max(w, weight))
+            return
+        if len(self._docs) >= self.MAX_DOCS:
+            return
+        doc = len(self._docs)
+        self._docs.append((title, value, weight))
+        self._by_value[value] = doc
+        norm = normalize_ar(title)
+        for word in norm.split():
+            for n in range(1, min(len(word), self.PREFIX_LEN) + 1):
+                self._prefix[word[:n]].add(doc)
+        for g in _trigrams(norm):
+            self._grams[g].add(doc)
+
+    def add_many(self, items: Iterable[Tuple[str, str]], weight: float = 1.0) -> None:
+        for title, value in items:
+            self.add(title, value, weight)
+
+    def search(self, query: str, limit: int = 25) -> List[Tuple[str, str]]:
+        """أفضل limit نتيجة (عنوان، قيمة)؛ الاستعلام الفارغ يعيد الأعلى وزنًا."""
+        norm = normalize_ar(query)
+        if not norm:
+            ranked = sorted(range(len(self._docs)), key=lambda d: -self._docs[d][2])
+            return [self._docs[d][:2] for d in ranked[:limit]]
+
+        words = norm.split()
+        scores: Dict[int, float] = defaultdict(float)
+        # كل كلمة من الاستعلام بادئة لكلمة فى العنوان → نقطة كاملة
+        for w in words:
+            for doc in self._prefix.get(w[:self.PREFIX_LEN], ()):
+                scores[doc] += 1.0
+        # trigrams للتطابق الجزئى (وزن أقلّ)
+        grams = _trigrams(norm)
+        if len(norm) >= 3:
+            for g in grams:
+                for doc in self._grams.get(g, ()):
+                    scores[doc] += 1.0 / len(grams)
+
+        ranked = sorted(scores.items(),
+                        key=lambda kv: -(kv[1] * self._docs[kv[0]][2]))
+        out = []
+        for doc, score in ranked:
+            if score < 0.5:             # تشابه ضعيف جدًّا
+                continue
+            out.append(self._docs[doc][:2])
+            if len(out) >= limit:
+                break
+        return out
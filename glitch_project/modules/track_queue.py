@@ -0,0 +1,203 @@
+# modules/track_queue.py
+import itertools
+import random
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class Track:
+    """
+    عنصر طابور مضغوط: حقول ثابتة (__slots__) بدل dict لكل مقطع. الكائن نفسه
+    هو هويّة المقطع (مقارنة بـ is) ولا تتغيّر بالحذف أو النقل أو الخلط.
+    يدعم واجهة dict المستخدمة فى بقيّة الكود (get / [] / in / update / pop)
+    فيعمل merge_media والتنزيل المسبق والبثّ عليه كما هى؛ الحقل غير المضبوط
+    (None) يُعامَل كمفتاح غير موجود، والمفاتيح النادرة تُحفظ فى extra.
+    """
+    FIELDS = ("url", "title", "duration", "path", "codec", "stream_url",
+              "user_agent", "resolved_at", "media_id", "is_playlist_item")
+    __slots__ = ("extra",) + FIELDS
+    _FIELD_SET = frozenset(FIELDS)
+
+    def __init__(self, url: str, **meta) -> None:
+        self.extra: Optional[Dict[str, object]] = None
+        for f in self.FIELDS:
+            setattr(self, f, None)
+        self.url = url
+        self.update(meta)
+
+    @classmethod
+    def of(cls, item) -> "Track":
+        """dict (نتيجة استخراج/متجر) → Track؛ الـ Track يُعاد كما هو."""
+        if isinstance(item, Track):
+            return item
+        meta = dict(item)
+        return cls(meta.pop("url"), **meta)
+
+    # ---------- واجهة dict ---------- #
+    def get(self, key: str, default=None):
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key: str):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value) -> None:
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def pop(self, key: str, default=None):
+        value = self.get(key, default)
+        if key in self._FIELD_SET:
+            setattr(self, key, None)
+        elif self.extra:
+            self.extra.pop(key, None)
+        return value
+
+    def update(self, other=(), **kw) -> None:
+        items = other.items() if hasattr(other, "items") else other
+        for k, v in itertools.chain(items, kw.items()):
+            self[k] = v
+
+    def __repr__(self) -> str:
+        return f"Track({self.title or self.url!r})"
+
+
+class TrackQueue:
+    """
+    طابور السيرفر: قائمة Track بترتيب التشغيل + موضع حالى.
+    • الإضافة، الوصول بالموضع، المقطع الحالى/التالى: O(1)
+    • الحذف/النقل/الخلط: إزاحة مصفوفة مؤشّرات واحدة (memmove) دون نسخ العناصر
+    • الموضع الحالى يُصحَّح عند كل تعديل قبله، فيبقى على نفس المقطع
+    • صفحة العرض تُقتطع بحجمها فقط مهما طال الطابور
+    • أصغر موضع تغيّر منذ آخر لقطة (take_dirty) → اللقطات تكتب الذيل المتغيّر فقط
+    يدعم len / [] / التكرار، فيُمرَّر مباشرة لمدير التنزيل المسبق.
+    """
+    def __init__(self) -> None:
+        self._items: List[Track] = []
+        self.pos = -1                   # موضع المقطع الحالى (-1 = لم يبدأ)
+        self._dirty: Optional[int] = None
+
+    def _touch(self, n: int) -> None:
+        self._dirty = n if self._dirty is None else min(self._dirty, n)
+
+    def take_dirty(self) -> Optional[int]:
+        """أصغر موضع تغيّر منذ آخر استدعاء (None = لا تغيير)، ثم التصفير."""
+        dirty, self._dirty = self._dirty, None
+        return dirty
+
+    def mark_dirty(self, n: int = 0) -> None:
+        """إعادة اعتبار الطابور متغيّرًا من n (فشل كتابة اللقطة مثلًا)."""
+        self._touch(n)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __iter__(self) -> Iterator[Track]:
+        return iter(self._items)
+
+    def __getitem__(self, n: int) -> Track:
+        return self._items[n]
+
+    # ---------- قراءة ---------- #
+    @property
+    def current(self) -> Optional[Track]:
+        return self._items[self.pos] if 0 <= self.pos < len(self._items) else None
+
+    def peek(self, offset: int = 1) -> Optional[Track]:
+        """المقطع بعد الحالى بـ offset (مع الالتفاف للبداية)."""
+        if not self._items:
+            return None
+        return self._items[(self.pos + offset) % len(self._items)]
+
+    def page(self, number: int, size: int) -> Tuple[int, List[Tuple[int, Track]]]:
+        """(عدد الصفحات، [(رقم العرض، Track)]) لصفحة number (من 0) فقط."""
+        pages = max(1, -(-len(self._items) // size))
+        number = min(max(number, 0), pages - 1)
+        start = number * size
+        return pages, list(enumerate(self._items[start:start + size], start + 1))
+
+    # ---------- إضافة ---------- #
+    def append(self, item) -> Track:
+        track = Track.of(item)
+        self._touch(len(self._items))
+        self._items.append(track)
+        return track
+
+    def extend(self, items: Iterable) -> List[Track]:
+        tracks = [Track.of(i) for i in items]
+        if tracks:
+            self._touch(len(self._items))
+        self._items.extend(tracks)
+        return tracks
+
+    def replace(self, items: Iterable) -> List[Track]:
+        self.clear()
+        return self.extend(items)
+
+    # ---------- تعديل ---------- #
+    def remove(self, n: int) -> Track:
+        """حذف الموضع n؛ حذف الحالى يجعل التالى يُشغَّل بعده مباشرة."""
+        track = self._items.pop(n)
+        self._touch(n)
+        if n <= self.pos:
+            self.pos -= 1
+        return track
+
+    def move(self, src: int, dst: int) -> Track:
+        track = self._items.pop(src)
+        dst = min(max(dst, 0), len(self._items))
+        self._items.insert(dst, track)
+        self._touch(min(src, dst))
+        if src == self.pos:
+            self.pos = dst
+        else:
+            if src < self.pos:
+                self.pos -= 1
+            if dst <= self.pos:
+                self.pos += 1
+        return track
+
+    def shuffle(self) -> None:
+        """خلط ما بعد الحالى فقط؛ المقطع الجارى وما سبقه لا يتغيّر."""
+        head = self.pos + 1
+        rest = self._items[head:]
+        random.shuffle(rest)
+        self._items[head:] = rest
+        self._touch(head)
+
+    def clear(self) -> None:
+        self._touch(0)
+        self._items.clear()
+        self.pos = -1
+
+    # ---------- تنقّل ---------- #
+    def advance(self) -> Optional[Track]:
+        """الانتقال للتالى (مع الالتفاف)."""
+        if not self._items:
+            self.pos = -1
+            return None
+        self.pos = (self.pos + 1) % len(self._items)
+        return self._items[self.pos]
+
+    def jump(self, n: int) -> None:
+        """التالى سيكون الموضع n (من 0)."""
+        self.pos = n - 1
+
+    def restart(self) -> None:
+        self.pos = -1